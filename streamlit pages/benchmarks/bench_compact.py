@@ -0,0 +1,49 @@
+#resident memory of the sample runs as merged float64 frames, as typed store frames and in the compact run cache form
+#usage: python benchmarks/bench_compact.py
+import glob
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logwise.ingest import create_summary
+from logwise.store import read_run
+from logwise.compact import CompactRun
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data to insert', 'Logs for Analysis')
+PORT = (51.116124, 1.319884)
+CURRENT = (51.107442, 1.338515)
+
+
+def main():
+    out_dir = tempfile.mkdtemp()
+    df_runs = create_summary(sorted(glob.glob(os.path.join(SAMPLES, '*.csv'))), PORT, CURRENT, out_dir=out_dir, workers=1)
+
+    merged = typed = compact = 0
+    encode = decode = 0.0
+    for area_name, exercise, file_name in zip(df_runs['area_name'], df_runs['exercise'], df_runs['file_name']):
+        #the merged frame as it was kept before the run store: float64 channels, object strings
+        merged += pd.read_csv(os.path.join(out_dir, area_name, file_name), index_col=0).memory_usage(deep=True).sum()
+        df = read_run(area_name, exercise, out_dir=out_dir)
+        typed += df.memory_usage(deep=True).sum()
+
+        start = time.perf_counter()
+        run = CompactRun(df)
+        encode += time.perf_counter() - start
+        start = time.perf_counter()
+        pd.testing.assert_frame_equal(run.frame(), df)
+        decode += time.perf_counter() - start
+        compact += run.nbytes
+
+    print(f'{len(df_runs)} runs')
+    print(f'merged float64  {merged / 1024 ** 2:7.2f} MB')
+    print(f'typed store     {typed / 1024 ** 2:7.2f} MB  {merged / typed:4.1f}x smaller')
+    print(f'compact         {compact / 1024 ** 2:7.2f} MB  {merged / compact:4.1f}x smaller')
+    print(f'encode {encode / len(df_runs) * 1000:.1f} ms/run, decode + check {decode / len(df_runs) * 1000:.1f} ms/run')
+
+
+if __name__ == '__main__':
+    main()
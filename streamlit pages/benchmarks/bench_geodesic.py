@@ -0,0 +1,49 @@
+#checks the vectorized distance kernel against geopy's geodesic on the sample logs and compares their speed
+#usage: python benchmarks/bench_geodesic.py
+import glob
+import os
+import sys
+import time
+
+import geopy.distance
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logwise.geo import GEODESIC_RTOL, distance_m, closest_point
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data to insert', 'Logs for Analysis')
+CURRENT = (51.107442, 1.338515)
+
+
+def main():
+    worst = 0.0
+    geopy_s, numpy_s = 0.0, 0.0
+    same_point = 0
+    files = sorted(glob.glob(os.path.join(SAMPLES, '*ShipDynamics*.csv')))
+    for path in files:
+        df = pd.read_csv(path, header=8).drop([0])
+        lat = df['Latitude'].astype(float).values
+        long = df['Longitude'].astype(float).values
+
+        start = time.perf_counter()
+        reference = np.array([geopy.distance.geodesic((a, b), CURRENT).m for a, b in zip(lat, long)])
+        geopy_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        approx = distance_m(lat, long, *CURRENT)
+        numpy_s += time.perf_counter() - start
+
+        worst = max(worst, float(np.max(np.abs(approx - reference) / np.maximum(reference, 1.0))))
+        same_point += closest_point(lat, long, *CURRENT)[0] == int(np.argmin(reference))
+
+    print(f'{len(files)} tracks')
+    print(f'geopy geodesic: {geopy_s:.3f} s, numpy kernel: {numpy_s:.4f} s ({geopy_s / numpy_s:.0f}x)')
+    print(f'max relative error: {worst:.2e} (tolerance {GEODESIC_RTOL:.0e})')
+    print(f'closest point identical to geopy: {same_point}/{len(files)}')
+    if worst > GEODESIC_RTOL:
+        sys.exit('distance kernel is outside the stated tolerance')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#wall time of create_summary against the number of worker processes
+#the corpus is synthesized by copying the sample pairs in 'data to insert/Logs for Analysis' under new exercise names
+#usage: python benchmarks/bench_ingest.py [copies]
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logwise.ingest import create_summary
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data to insert', 'Logs for Analysis')
+PORT = (51.116124, 1.319884)
+CURRENT = (51.107442, 1.338515)
+
+
+#copies every sample pair n times, renaming the exercise inside the header so each copy is a separate run
+def synthesize_corpus(target_dir, copies):
+    files = []
+    for path in sorted(glob.glob(os.path.join(SAMPLES, '*.csv'))):
+        name = os.path.basename(path)
+        exercise = name.split(' - ')[0]
+        with open(path, 'r') as f:
+            content = f.read()
+        for i in range(copies):
+            new_exercise = f'{exercise}_{i:03d}'
+            new_path = os.path.join(target_dir, name.replace(exercise, new_exercise, 1))
+            with open(new_path, 'w') as f:
+                f.write(content.replace(f'Exercise name: {exercise}.nti', f'Exercise name: {new_exercise}.nti', 1))
+            files.append(new_path)
+    return sorted(files)
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    corpus_dir = tempfile.mkdtemp()
+    out_dir = tempfile.mkdtemp()
+    try:
+        files = synthesize_corpus(corpus_dir, copies)
+        print(f'{len(files) // 2} runs, {os.cpu_count()} cores')
+        print('workers  wall_s  speedup')
+        counts = sorted({2 ** i for i in range(os.cpu_count().bit_length()) if 2 ** i <= os.cpu_count()} | {os.cpu_count()})
+        baseline = None
+        for workers in counts:
+            start = time.perf_counter()
+            create_summary(files, PORT, CURRENT, out_dir=out_dir, workers=workers)
+            wall = time.perf_counter() - start
+            baseline = baseline or wall
+            print(f'{workers:7d}  {wall:6.2f}  {baseline / wall:7.2f}')
+    finally:
+        shutil.rmtree(corpus_dir, ignore_errors=True)
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
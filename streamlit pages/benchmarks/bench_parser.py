@@ -0,0 +1,54 @@
+#compares the single-pass report reader with the previous csv.reader + read_csv(header=8) + astype path
+#usage: python benchmarks/bench_parser.py [repeats]
+import csv
+import glob
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logwise.ntpro import read_report
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data to insert', 'Logs for Analysis')
+
+
+#the path used before: whole file into a list for the header, parsed again by pandas, then cast column by column
+def previous_path(file_name):
+    with open(file_name, 'r') as file:
+        lst_my_reader = list(csv.reader(file, delimiter=','))
+    info = [str(line) for line in lst_my_reader[:8]]
+
+    df = pd.read_csv(file_name, sep=',', header=8)
+    df = df.drop([0])
+    for column in df.columns:
+        if column in ('time', 'Autopilot state'):
+            continue
+        if df[column].dtype != float:
+            df[column] = df[column].astype(str).str.replace(',', '')
+        df[column] = df[column].astype(float)
+    return info, df
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    files = sorted(glob.glob(os.path.join(SAMPLES, '*.csv')))
+    rows = 0
+    timings = {}
+    for name, reader in (('previous', previous_path), ('read_report', read_report)):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for file_name in files:
+                df = reader(file_name)[-1]
+                rows += len(df)
+        timings[name] = (time.perf_counter() - start) / repeats
+
+    print(f'{len(files)} files, {rows // (2 * repeats)} rows per pass')
+    for name, seconds in timings.items():
+        print(f'{name:12s} {seconds:.3f} s')
+    print(f"speed-up {timings['previous'] / timings['read_report']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#render time and html size of the Filter Routes map against the number of runs,
+#one GeoJson layer (build_routes_map) against the previous Choropleth per run
+#usage: python benchmarks/bench_route_map.py [copies]
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import folium
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logwise.ingest import create_summary
+from logwise.maps import build_routes_map
+from logwise.store import read_run
+from bench_ingest import synthesize_corpus, PORT, CURRENT
+
+
+#the previous map: one Choropleth and tooltip per run with every fix and every summary column
+def previous_routes_map(df, out_dir):
+    map = folium.Map(location=[(df['min_lat'].min() + df['max_lat'].max()) / 2, (df['min_long'].min() + df['max_long'].max()) / 2], zoom_start=4, tiles='CartoDB positron')
+    for row in df.to_dict('records'):
+        df_ex = read_run(row['area_name'], row['exercise'], ['latitude', 'longitude'], out_dir)
+        geojson_data = {'type': 'FeatureCollection', 'features': [{
+            'type': 'Feature',
+            'id': row['exercise'],
+            'geometry': {'type': 'LineString', 'coordinates': list(zip(df_ex['longitude'], df_ex['latitude']))},
+            'properties': row,
+        }]}
+        choropleth = folium.Choropleth(geo_data=geojson_data, line_opacity=0.8, highlight=True, line_color='red' if row['type'] == 'Arrival' else 'blue', smooth_factor=1)
+        choropleth.geojson.add_to(map)
+        choropleth.geojson.add_child(folium.features.GeoJsonTooltip(['exercise'], labels=False))
+    return map
+
+
+def measure(build):
+    start = time.perf_counter()
+    html = build().get_root().render()
+    return time.perf_counter() - start, len(html.encode())
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    corpus_dir = tempfile.mkdtemp()
+    out_dir = tempfile.mkdtemp()
+    try:
+        df_runs = create_summary(synthesize_corpus(corpus_dir, copies), PORT, CURRENT, out_dir=out_dir)
+        print('runs  previous_s  previous_kb  layer_s  layer_kb')
+        for n in (1, 10, 50, 100, 200, 500):
+            if n > len(df_runs):
+                break
+            df = df_runs.head(n)
+            previous_s, previous_size = measure(lambda: previous_routes_map(df, out_dir))
+            layer_s, layer_size = measure(lambda: build_routes_map(df, 13, out_dir))
+            print(f'{n:4d}  {previous_s:10.3f}  {previous_size / 1024:11.0f}  {layer_s:7.3f}  {layer_size / 1024:8.0f}')
+    finally:
+        shutil.rmtree(corpus_dir, ignore_errors=True)
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
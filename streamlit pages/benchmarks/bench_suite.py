@@ -0,0 +1,164 @@
+#end-to-end benchmark on synthetic corpora: ingestion, summary filtering, multi-run map and single-run analysis
+#at several archive sizes; every timing is appended to a JSON lines file with the commit it was measured on
+#usage: python benchmarks/bench_suite.py [--runs 10 100 1000] [--duration 1800] [--step 1] [--workers N] [--results FILE]
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logwise.cache import DERIVATION_VERSION
+from logwise.ingest import create_summary
+from logwise.maps import build_routes_map
+from logwise.query import RunIndex
+from logwise.runcache import RunCache
+from logwise.synth import generate_corpus, DEFAULT_PORT
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results.jsonl')
+ROUTE_ANALYSIS = glob.glob(os.path.join(APP_DIR, 'pages', '3_*Route Analysis.py'))[0]
+CURRENT = (51.107442, 1.338515)
+
+#folium warns about the tile provider on every map
+warnings.filterwarnings('ignore', category=UserWarning, module='folium')
+
+#filters of the Filter Routes page
+CATEGORY_FILTERS = ['type', 'ship', 'wrose_wind_direction', 'wrose_current_direction']
+RANGE_FILTERS = ['wind_speed', 'current_velocity', 'min_ukc_fwd', 'min_ukc_aft', 'peak_rate_of_turn']
+
+
+#commit the numbers belong to, marked when the tree has local changes other than the results file itself
+def code_version():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=APP_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--', '.', ':!benchmarks/results.jsonl'], cwd=APP_DIR, capture_output=True, text=True).stdout.strip()
+        return commit + ('+dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+#corpus of a given size, generated once and kept in corpus_dir for the next sessions
+def corpus(corpus_dir, runs, duration, step, seed):
+    target = os.path.join(corpus_dir, f'runs{runs}_d{duration}_s{step}_seed{seed}')
+    files = sorted(glob.glob(os.path.join(target, '*.csv')))
+    if len(files) == 2 * runs:
+        return files, 0.0
+    shutil.rmtree(target, ignore_errors=True)
+    start = time.perf_counter()
+    files = generate_corpus(target, runs, duration, step, seed)
+    return files, time.perf_counter() - start
+
+#RunIndex build plus random filter combinations like the ones picked on Filter Routes
+def time_filtering(df, queries=200, seed=0):
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    index = RunIndex(df, CATEGORY_FILTERS, RANGE_FILTERS)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        selections = {}
+        for column in CATEGORY_FILTERS:
+            options = index.options(column)
+            selections[column] = list(rng.choice(options, size=rng.integers(0, len(options) + 1), replace=False))
+        low, high = index.value_range('min_ukc_fwd')
+        index.query(selections, {'min_ukc_fwd': (low + (high - low) * rng.random() / 2, high)})
+    return build, (time.perf_counter() - start) / queries
+
+#routes map of every run with a cold run cache, then again with the cache warm; includes rendering the html
+def time_routes_map(df, out_dir):
+    cache = RunCache()
+    timings = []
+    for _ in range(2):
+        start = time.perf_counter()
+        build_routes_map(df, 13, out_dir, cache=cache).get_root().render()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+#Route Analysis page rendered headless for the first run, first and second script run
+def time_route_analysis(df, out_dir):
+    from streamlit.testing.v1 import AppTest
+    from streamlit.logger import set_log_level
+    #bare-mode and deprecation messages would drown the table
+    set_log_level('error')
+    app = AppTest.from_file(ROUTE_ANALYSIS, default_timeout=600)
+    app.session_state.df_runs = df
+    app.session_state.df_initial = df
+    app.session_state.uploaded_comments = False
+    app.session_state.out_dir = out_dir
+    timings = []
+    for _ in range(2):
+        start = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - start)
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description='LogWise benchmarks on synthetic NTPro corpora')
+    parser.add_argument('--runs', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--duration', type=int, default=1800, help='mean run duration in seconds')
+    parser.add_argument('--step', type=int, default=1, help='logging step in seconds')
+    parser.add_argument('--workers', type=int, default=None, help='ingestion worker processes (default: one per CPU)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--corpus-dir', default=os.path.join(tempfile.gettempdir(), 'logwise_bench_corpus'))
+    parser.add_argument('--results', default=RESULTS, help='JSON lines file the timings are appended to')
+    args = parser.parse_args()
+
+    version = code_version()
+    context = {
+        'version': version, 'derivation_version': DERIVATION_VERSION, 'python': platform.python_version(),
+        'pandas': pd.__version__, 'numpy': np.__version__, 'cpus': os.cpu_count(),
+        'duration': args.duration, 'step': args.step, 'workers': args.workers,
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+    }
+    print(f'version {version}, {os.cpu_count()} cores')
+    print('   runs  stage                      seconds')
+
+    with open(args.results, 'a') as results:
+        def record(runs, stage, seconds):
+            print(f'{runs:7d}  {stage:24s} {seconds:9.4f}')
+            results.write(json.dumps({**context, 'runs': runs, 'stage': stage, 'seconds': seconds}) + '\n')
+            results.flush()
+
+        for runs in args.runs:
+            files, generate = corpus(args.corpus_dir, runs, args.duration, args.step, args.seed)
+            if generate:
+                record(runs, 'generate_corpus', generate)
+
+            out_dir = tempfile.mkdtemp()
+            try:
+                start = time.perf_counter()
+                df = create_summary(files, DEFAULT_PORT, CURRENT, out_dir=out_dir, workers=args.workers)
+                record(runs, 'ingest', time.perf_counter() - start)
+
+                build, query = time_filtering(df)
+                record(runs, 'filter_index_build', build)
+                record(runs, 'filter_query', query)
+
+                cold, warm = time_routes_map(df, out_dir)
+                record(runs, 'routes_map_cold', cold)
+                record(runs, 'routes_map_warm', warm)
+
+                first, rerun = time_route_analysis(df, out_dir)
+                record(runs, 'route_analysis_first', first)
+                record(runs, 'route_analysis_rerun', rerun)
+            finally:
+                shutil.rmtree(out_dir, ignore_errors=True)
+
+    print(f'results appended to {args.results}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+#swept path throughput on synthetic runs, and how far the pairwise hull union is from unioning every outline
+#usage: python benchmarks/bench_swept.py [--runs 300] [--duration 1800]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import shapely
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logwise.geo import to_local_m
+from logwise.swept import swept_path, hull_corners, hull_outline, ship_dimensions
+from logwise.synth import simulate_run, SHIPS
+
+
+#union of the outline at every tick, no decimation and no hulls between ticks
+def snapshot_area(lat, long, heading, ship):
+    ref_lat, ref_long = (lat.min() + lat.max()) / 2, (long.min() + long.max()) / 2
+    corners = hull_corners(*to_local_m(lat, long, ref_lat, ref_long), heading, hull_outline(*ship_dimensions(ship)))
+    return shapely.union_all(shapely.polygons(corners)).area
+
+def main():
+    parser = argparse.ArgumentParser(description='swept path benchmark')
+    parser.add_argument('--runs', type=int, default=300)
+    parser.add_argument('--duration', type=int, default=1800)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    tracks = []
+    for i in range(args.runs):
+        values = simulate_run(rng, int(args.duration * rng.uniform(0.8, 1.2)), arrival=bool(i % 2))
+        tracks.append((values['Latitude'], values['Longitude'], values['Heading'], SHIPS[i % len(SHIPS)]))
+    ticks = sum(len(track[0]) for track in tracks)
+
+    start = time.perf_counter()
+    areas = [swept_path(*track)[1] for track in tracks]
+    elapsed = time.perf_counter() - start
+    print(f'{args.runs} runs, {ticks} ticks: {elapsed:.2f} s ({elapsed / args.runs * 1000:.1f} ms/run, {ticks / elapsed / 1e6:.2f} M ticks/s)')
+
+    #reference on a few runs: the outlines alone miss the motion between ticks, so the swept path is slightly larger
+    sample = range(min(10, args.runs))
+    start = time.perf_counter()
+    reference = [snapshot_area(*tracks[i]) for i in sample]
+    reference_elapsed = time.perf_counter() - start
+    ratio = np.array([areas[i] for i in sample]) / np.array(reference)
+    print(f'every outline unioned: {reference_elapsed / len(sample) * 1000:.1f} ms/run, swept/outlines area {ratio.min():.4f}-{ratio.max():.4f}')
+
+
+if __name__ == '__main__':
+    main()
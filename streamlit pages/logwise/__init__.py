@@ -0,0 +1 @@
+#LogWise processing modules shared by the streamlit pages
@@ -0,0 +1,6 @@
+import sys
+from logwise.cli import main
+
+#guarded so worker processes started with spawn do not run the batch again
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from logwise.store import run_path
+from logwise.swept import swept_path_file
+
+#persistent ingestion cache, one entry per run pair keyed by a content hash of both files and the coordinates
+#an entry holds the summary row (finfo.json) plus the per-run csv, store partition and swept path produced for it
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.logwise', 'cache')
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+#bump whenever process_run derives anything differently, so old entries stop matching
+DERIVATION_VERSION = 9
+
+
+#content hash of a run pair and everything else its outputs depend on
+def run_key(log, ship, port, current, exact_geodesic=False):
+    digest = hashlib.sha256(f'v{DERIVATION_VERSION}|{port}|{current}|{exact_geodesic}'.encode())
+    for file_name in (log, ship):
+        with open(file_name, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+def entry_dir(key, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, key[:2], key)
+
+#restores a cached run into out_dir and returns its summary row, or None when the pair is not cached
+def get(key, out_dir='.', cache_dir=CACHE_DIR):
+    entry = entry_dir(key, cache_dir)
+    try:
+        with open(os.path.join(entry, 'finfo.json'), 'r') as file:
+            finfo = json.load(file)
+    except FileNotFoundError:
+        return None
+
+    area_dir = os.path.join(out_dir, finfo['area_name'])
+    os.makedirs(area_dir, exist_ok=True)
+    shutil.copyfile(os.path.join(entry, 'run.csv'), os.path.join(area_dir, finfo['file_name']))
+    store_file = run_path(finfo['area_name'], finfo['exercise'], out_dir)
+    os.makedirs(os.path.dirname(store_file), exist_ok=True)
+    shutil.copyfile(os.path.join(entry, 'run.arrow'), store_file)
+    shutil.copyfile(os.path.join(entry, 'swept.wkb'), swept_path_file(finfo['area_name'], finfo['exercise'], out_dir))
+
+    #mark as recently used for the LRU eviction
+    os.utime(entry)
+    return finfo
+
+#stores the outputs of a freshly processed run
+def put(key, finfo, out_dir='.', cache_dir=CACHE_DIR):
+    entry = entry_dir(key, cache_dir)
+    os.makedirs(os.path.dirname(entry), exist_ok=True)
+
+    #build the entry aside and move it in place, so readers never see half an entry
+    staging = tempfile.mkdtemp(dir=os.path.dirname(entry))
+    shutil.copyfile(os.path.join(out_dir, finfo['area_name'], finfo['file_name']), os.path.join(staging, 'run.csv'))
+    shutil.copyfile(run_path(finfo['area_name'], finfo['exercise'], out_dir), os.path.join(staging, 'run.arrow'))
+    shutil.copyfile(swept_path_file(finfo['area_name'], finfo['exercise'], out_dir), os.path.join(staging, 'swept.wkb'))
+    with open(os.path.join(staging, 'finfo.json'), 'w') as file:
+        json.dump(finfo, file, default=float)
+    try:
+        os.replace(staging, entry)
+    except OSError:
+        #another worker stored the same pair first
+        shutil.rmtree(staging, ignore_errors=True)
+
+#removes least recently used entries until the cache fits in max_bytes
+def evict(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    entries = []
+    for prefix in os.scandir(cache_dir) if os.path.isdir(cache_dir) else []:
+        if not prefix.is_dir():
+            continue
+        for entry in os.scandir(prefix.path):
+            size = sum(f.stat().st_size for f in os.scandir(entry.path))
+            entries.append((entry.stat().st_mtime, size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+    return total
+
+#drops every entry, e.g. after changing the derivation logic without bumping DERIVATION_VERSION
+def clear(cache_dir=CACHE_DIR):
+    shutil.rmtree(cache_dir, ignore_errors=True)
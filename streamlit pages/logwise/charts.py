@@ -0,0 +1,51 @@
+import altair as alt
+import numpy as np
+import pandas as pd
+import streamlit as st
+from logwise.store import read_run, run_modified
+
+#time-series charts of Route Analysis: each chart only carries seconds and the plotted channel,
+#decimated to the chart width, and the line layer is cached per run and channel
+CHART_WIDTH_PX = 1200
+
+#channels shown before the user picks others
+DEFAULT_CHANNELS = ['sog', 'rate_of_turn', 'true_wind_speed', 'true_wind_direction']
+
+#axis labels as HH:MM:SS from seconds
+TIME_LABELS = "utcFormat(datum.value * 1000, '%H:%M:%S')"
+
+
+#keeps the first/last point and the min and max of y in each of `width` buckets, so peaks survive decimation
+def decimate_minmax(x, y, width):
+    n = len(x)
+    if n <= 2 * width:
+        return x, y
+    bucket = np.arange(n) * width // n
+    order = np.lexsort((y, bucket))
+    starts = np.flatnonzero(np.r_[True, bucket[order][1:] != bucket[order][:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    keep = np.unique(np.r_[0, order[starts], order[ends], n - 1])
+    return x[keep], y[keep]
+
+#line layer for one run channel, built once per run, channel and color
+#modified is the partition mtime, only there so a run ingested again gets a new chart
+@st.cache_resource(max_entries=128)
+def cached_chart(area_name, exercise, column, color, width, out_dir, modified):
+    df = read_run(area_name, exercise, ['seconds', column], out_dir)
+    seconds, values = decimate_minmax(df['seconds'].values, df[column].values, width)
+    df_ch = pd.DataFrame({'seconds': seconds, column: values})
+    return alt.Chart(df_ch).mark_line(color=color).encode(
+        x=alt.X('seconds', title='Time', axis=alt.Axis(labelExpr=TIME_LABELS)),
+        y=alt.Y(column, title=column.replace('_',' ').title()),
+    ).properties(width=550)
+
+def base_chart(area_name, exercise, column, color, width=CHART_WIDTH_PX, out_dir='.'):
+    return cached_chart(area_name, exercise, column, color, width, out_dir, run_modified(area_name, exercise, out_dir))
+
+#orange rule at the selected second, the only layer rebuilt when the timeframe changes
+def time_rule(seconds):
+    return alt.Chart().mark_rule(color="orange", strokeWidth=2).encode(x=alt.datum(seconds), size=alt.value(2))
+
+#numeric channels a run can plot
+def numeric_channels(df):
+    return [c for c in df.columns if pd.api.types.is_float_dtype(df[c]) and c not in ('latitude', 'longitude')]
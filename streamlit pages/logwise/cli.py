@@ -0,0 +1,80 @@
+import argparse
+import glob
+import os
+import sys
+from logwise import cache
+from logwise.ingest import create_summary, read_coordinates
+from logwise.merge import match_files
+from logwise.profiling import Profiler
+
+#headless ingestion: builds the run store, spatial indexes and summary of a batch of NTPro reports,
+#so the app can open them later without uploading anything
+#usage: python -m logwise "Logs for Analysis" --coordinates "port and current coordinates.txt" --out data
+
+
+#report files of every input, each being a directory or a glob pattern
+def expand_inputs(inputs):
+    files = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            files.extend(sorted(glob.glob(os.path.join(pattern, '*.csv'))))
+        else:
+            files.extend(sorted(glob.glob(pattern)))
+    return files
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m logwise', description='Process NTPro Log-/ShipDynamics- report pairs into a LogWise data directory.')
+    parser.add_argument('inputs', nargs='+', help='directories or glob patterns of report csv files')
+    parser.add_argument('-c', '--coordinates', required=True, help="port and current coordinates file ('port_lat 51.116124 dover' lines)")
+    parser.add_argument('-a', '--area', help='area of the coordinates file to use, required when it holds several')
+    parser.add_argument('--comments', help='comments csv (; separated) merged into the summary')
+    parser.add_argument('-o', '--out', default='.', help='output directory for the runs, run store and summary (default: current directory)')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='worker processes (default: one per CPU, 1 runs in process)')
+    parser.add_argument('--exact-geodesic', action='store_true', help='refine the current measurement point with exact geodesic distances')
+    parser.add_argument('--no-cache', action='store_true', help='process every pair again instead of reusing the ingestion cache')
+    parser.add_argument('--cache-dir', default=cache.CACHE_DIR, help=f'ingestion cache directory (default: {cache.CACHE_DIR})')
+    parser.add_argument('--profile', metavar='JSONL', help='append the timing spans of every stage to this JSON lines file')
+    parser.add_argument('--profile-memory', action='store_true', help='also record peak traced memory per span (much slower)')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    coordinates = read_coordinates(args.coordinates)
+    if args.area:
+        if args.area.lower() not in coordinates:
+            sys.exit(f"Area '{args.area}' not in {args.coordinates} (found: {', '.join(coordinates)})")
+        port, current = coordinates[args.area.lower()]
+    elif len(coordinates) == 1:
+        port, current = next(iter(coordinates.values()))
+    else:
+        sys.exit(f"{args.coordinates} holds several areas, choose one with --area ({', '.join(coordinates)})")
+
+    files = expand_inputs(args.inputs)
+    pairs, unpaired = match_files(files)
+    for file_name in unpaired:
+        print(f'No matching Log/ShipDynamics file for {os.path.basename(file_name)}, skipped', file=sys.stderr)
+    if not pairs:
+        sys.exit('No Log/ShipDynamics pairs found.')
+
+    def show_progress(done, total, finfo):
+        if finfo is not None:
+            print(f"Loaded {finfo['exercise']} ({done}/{total})", flush=True)
+
+    #pairs that fail are reported at the end, the others are still written
+    errors = []
+
+    profiler = Profiler(args.profile_memory) if args.profile else None
+
+    os.makedirs(args.out, exist_ok=True)
+    df_runs = create_summary(files, port, current, comments=args.comments, out_dir=args.out, workers=args.workers,
+                             progress=show_progress, exact_geodesic=args.exact_geodesic, cache_dir=None if args.no_cache else args.cache_dir, profiler=profiler, errors=errors)
+    print(f'{len(df_runs)} runs written to {os.path.abspath(args.out)}')
+    for error in errors:
+        print(f"Failed {error['log']} / {error['ship']}: {error['error']}", file=sys.stderr)
+
+    if profiler:
+        profiler.close()
+        profiler.write_jsonl(args.profile)
+        print(f'{len(profiler.spans)} timing spans appended to {args.profile}')
+    return 1 if errors else 0
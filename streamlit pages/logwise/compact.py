@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+from logwise.store import FLOAT64_COLUMNS
+from logwise.merge import seconds_to_times
+
+#compact in-memory form of a run frame for the run cache: 'time' is rebuilt from the integer seconds,
+#constant channels are kept as one scalar, channels that rarely change (autopilot state, thruster orders)
+#as runs of equal values, channels logged with up to 2 decimals as int16 scaled by 10**decimals,
+#and the rest as float32 (positions float64) or categoricals; frame() decodes it back column by column
+
+#a channel becomes run-length encoded when it changes less often than once every RLE_MIN_RUN_LENGTH ticks
+RLE_MIN_RUN_LENGTH = 8
+SCALE_DECIMALS = (0, 1, 2)
+
+
+#positions where a column takes a new value, NaN being equal to NaN
+def change_points(series):
+    values = series.values
+    missing = series.isna().values
+    same = (values[1:] == values[:-1]) | (missing[1:] & missing[:-1])
+    return np.flatnonzero(~np.asarray(same)) + 1
+
+#decimals and int16 codes when every value is a short decimal that fits, otherwise None
+def scaled_codes(values):
+    values = np.asarray(values)
+    if values.dtype.kind != 'f' or np.isnan(values).any():
+        return None
+    exact = values.astype(np.float64)
+    for decimals in SCALE_DECIMALS:
+        scale = 10 ** decimals
+        codes = np.round(exact * scale)
+        if np.abs(codes).max(initial=0) > np.iinfo(np.int16).max:
+            return None
+        #decoding divides in the stored dtype, so it must give back the exact same values
+        if np.array_equal((codes.astype(values.dtype) / values.dtype.type(scale)).astype(values.dtype), values):
+            return decimals, codes.astype(np.int16)
+    return None
+
+
+class CompactRun:
+    def __init__(self, df):
+        self.length = len(df)
+        self.column_names = list(df.columns)
+        self.dtypes = df.dtypes.to_dict()
+        self.constants = {}
+        self.runs = {}
+        self.scaled = {}
+        self.arrays = {}
+
+        for column in df.columns:
+            if column == 'time' and 'seconds' in df:
+                continue
+            values = df[column].array if isinstance(df[column].dtype, pd.CategoricalDtype) else df[column].values
+            changes = change_points(df[column])
+            if self.length and len(changes) == 0:
+                self.constants[column] = values[0]
+            elif (len(changes) + 1) * RLE_MIN_RUN_LENGTH <= self.length and column not in FLOAT64_COLUMNS:
+                starts = np.r_[0, changes].astype(np.int32)
+                self.runs[column] = (starts, values[starts])
+            elif column not in FLOAT64_COLUMNS and (scaled := scaled_codes(values)) is not None:
+                self.scaled[column] = scaled
+            else:
+                self.arrays[column] = values
+
+    #values of one column, with the dtype of the original frame
+    def column(self, name):
+        dtype = self.dtypes[name]
+        if name == 'time' and name not in self.arrays:
+            return seconds_to_times(self.column('seconds'))
+        if name in self.constants:
+            value = self.constants[name]
+            if isinstance(dtype, pd.CategoricalDtype):
+                return pd.Categorical([value] * self.length, dtype=dtype)
+            return np.full(self.length, value, dtype=dtype)
+        if name in self.runs:
+            starts, values = self.runs[name]
+            lengths = np.diff(np.r_[starts, self.length])
+            if isinstance(dtype, pd.CategoricalDtype):
+                return pd.Categorical.from_codes(np.repeat(values.codes, lengths), dtype=dtype)
+            return np.repeat(values, lengths)
+        if name in self.scaled:
+            decimals, codes = self.scaled[name]
+            return codes.astype(dtype) / dtype.type(10 ** decimals)
+        return self.arrays[name]
+
+    #decoded frame, all columns or only the given ones that the run has
+    def frame(self, columns=None):
+        columns = self.column_names if columns is None else [c for c in columns if c in self.dtypes]
+        return pd.DataFrame({name: self.column(name) for name in columns}, columns=columns)
+
+    #memory held by the encoded columns
+    @property
+    def nbytes(self):
+        total = sum(getattr(values, 'nbytes', 0) for values in self.arrays.values())
+        total += sum(codes.nbytes for _, codes in self.scaled.values())
+        total += sum(starts.nbytes + getattr(values, 'nbytes', 0) for starts, values in self.runs.values())
+        return total + 8 * len(self.constants)
+
+    #how each column is stored, for the diagnostics page
+    def encodings(self):
+        return {'constant': len(self.constants), 'run-length': len(self.runs), 'scaled int16': len(self.scaled), 'plain': len(self.arrays)}
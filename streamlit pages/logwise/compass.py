@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+#16-point compass binning on whole arrays
+#sectors are 22.5 degrees wide, centred on their direction, with the upper bound inclusive
+#(11.25 is N, 11.26 is NNE), so every value gets a sector
+COMPASS_SECTORS = ['N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE', 'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW']
+SECTOR_WIDTH = 360 / len(COMPASS_SECTORS)
+
+
+#sector index (0 = N) of every value, -1 for missing values
+def sector_index(degrees):
+    degrees = np.asarray(degrees, dtype=float)
+    index = np.full(degrees.shape, -1, dtype=np.int8)
+    valid = ~np.isnan(degrees)
+    index[valid] = np.ceil((np.mod(degrees[valid], 360) - SECTOR_WIDTH / 2) / SECTOR_WIDTH) % len(COMPASS_SECTORS)
+    return index
+
+#compass directions as a categorical column
+def to_compass(degrees):
+    return pd.Categorical.from_codes(sector_index(degrees), categories=COMPASS_SECTORS)
+
+#sectors present in the values, in order of first appearance ('SW- WSW')
+def direction_label(degrees):
+    index = sector_index(degrees)
+    return '- '.join(COMPASS_SECTORS[i] for i in pd.unique(index[index >= 0]))
+
+#single value to compass direction
+def degrees_to_direction(degrees):
+    index = sector_index([degrees])[0]
+    return COMPASS_SECTORS[index] if index >= 0 else None
@@ -0,0 +1,66 @@
+import warnings
+import numpy as np
+import pandas as pd
+
+#batch engine for comparing many runs: every run is resampled onto a common axis,
+#one (runs x points) array per channel, and the ensemble envelopes come from column-wise reductions
+
+#channels offered for comparison
+ENSEMBLE_CHANNELS = ['sog', 'rate_of_turn', 'under_keel_clearance_fwd', 'under_keel_clearance_aft', 'bow_thruster_gained_power', 'stern_thruster_gained_power']
+
+#common axes: elapsed seconds since the first tick, or distance to the port point (precomputed at ingest)
+AXES = {'time': 'Elapsed time (s)', 'distance': 'Distance to berth (m)'}
+
+PERCENTILES = (10, 50, 90)
+
+
+#axis value of every tick of a run
+def run_axis(frame, axis):
+    if axis == 'time':
+        seconds = frame['seconds'].values.astype(float)
+        return seconds - seconds[0]
+    return frame['distance_to_port'].values.astype(float)
+
+#grid covering every run on the axis
+def common_grid(frames, axis, points):
+    end = max(float(np.nanmax(run_axis(frame, axis))) for frame in frames)
+    return np.linspace(0, end, points)
+
+#resamples the channels of every run onto the grid, NaN where a run does not cover a grid point or lacks the channel
+#time is interpolated; distance is not monotonic along a track, so each grid cell takes the mean of the ticks falling in it
+def resample(frames, channels, axis, points=400):
+    grid = common_grid(frames, axis, points)
+    stacks = {channel: np.full((len(frames), points), np.nan) for channel in channels}
+    for row, frame in enumerate(frames):
+        x = run_axis(frame, axis)
+        if axis == 'time':
+            inside = (grid >= x[0]) & (grid <= x[-1])
+            for channel in channels:
+                if channel not in frame:
+                    continue
+                stacks[channel][row, inside] = np.interp(grid[inside], x, frame[channel].values.astype(float))
+        else:
+            step = grid[1] - grid[0]
+            cell = np.clip(np.rint(x / step).astype(int), 0, points - 1)
+            for channel in channels:
+                if channel not in frame:
+                    continue
+                values = frame[channel].values.astype(float)
+                valid = ~np.isnan(values)
+                sums = np.bincount(cell[valid], weights=values[valid], minlength=points)
+                counts = np.bincount(cell[valid], minlength=points)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    stacks[channel][row] = np.where(counts > 0, sums / counts, np.nan)
+    return grid, stacks
+
+#mean, percentiles and number of runs covering each grid point, as a long frame ready for charting
+def envelope(grid, stack):
+    covered = (~np.isnan(stack)).sum(axis=0)
+    df = pd.DataFrame({'axis': grid, 'runs': covered})
+    #grid points no run covers are dropped below, silence the all-NaN warnings they raise
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        df['mean'] = np.nanmean(stack, axis=0)
+        for percentile, values in zip(PERCENTILES, np.nanpercentile(stack, PERCENTILES, axis=0)):
+            df[f'p{percentile}'] = values
+    return df[covered > 0]
@@ -0,0 +1,86 @@
+import numpy as np
+import geopy.distance
+
+#WGS84 ellipsoid
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+
+#max relative error of distance_m against geopy's geodesic for points less than 50 km apart
+#checked on the sample logs by benchmarks/bench_geodesic.py
+GEODESIC_RTOL = 1e-4
+
+
+#distance in meters from every (lat, long) to a reference point, in one array pass
+#uses the ellipsoid radii of curvature at the mean latitude of each pair (ellipsoidal flat-earth)
+def distance_m(lat, long, ref_lat, ref_long):
+    lat = np.asarray(lat, dtype=float)
+    long = np.asarray(long, dtype=float)
+
+    mean_lat = np.radians((lat + ref_lat) / 2)
+    w = 1 - WGS84_E2 * np.sin(mean_lat) ** 2
+    meridian_radius = WGS84_A * (1 - WGS84_E2) / w ** 1.5
+    normal_radius = WGS84_A / np.sqrt(w)
+
+    dy = meridian_radius * np.radians(lat - ref_lat)
+    dx = normal_radius * np.cos(mean_lat) * np.radians(long - ref_long)
+    return np.hypot(dx, dy)
+
+#position and distance of the track point closest to a reference point
+#with exact=True only the nearest candidates of the array pass are re-measured with geopy's geodesic
+def closest_point(lat, long, ref_lat, ref_long, exact=False, candidates=8):
+    distances = distance_m(lat, long, ref_lat, ref_long)
+
+    if not exact:
+        position = int(np.argmin(distances))
+        return position, float(distances[position])
+
+    lat = np.asarray(lat, dtype=float)
+    long = np.asarray(long, dtype=float)
+    k = min(candidates, len(distances))
+    nearest = np.argpartition(distances, k - 1)[:k]
+    #keep the track order so ties resolve to the first point, like idxmin
+    nearest.sort()
+    exact_distances = [geopy.distance.geodesic((lat[i], long[i]), (ref_lat, ref_long)).m for i in nearest]
+    best = int(np.argmin(exact_distances))
+    return int(nearest[best]), exact_distances[best]
+
+#closest point of every group of points (e.g. the runs of the spatial index) to a reference point
+#closest_point is the single-group case; returns the groups, the position of their closest point and its distance
+def closest_per_group(lat, long, groups, ref_lat, ref_long):
+    groups = np.asarray(groups)
+    distances = distance_m(lat, long, ref_lat, ref_long)
+    #group by group, nearest first; ties keep the track order like argmin
+    order = np.lexsort((distances, groups))
+    first = np.r_[True, groups[order][1:] != groups[order][:-1]] if len(order) else np.zeros(0, dtype=bool)
+    positions = order[first]
+    return groups[positions], positions, distances[positions]
+
+#local east/north coordinates in meters around a reference point, for a whole array at once
+#meant for harbour-sized areas (a few km around the reference)
+def to_local_m(lat, long, ref_lat, ref_long):
+    lat = np.asarray(lat, dtype=float)
+    long = np.asarray(long, dtype=float)
+
+    ref = np.radians(ref_lat)
+    w = 1 - WGS84_E2 * np.sin(ref) ** 2
+    meridian_radius = WGS84_A * (1 - WGS84_E2) / w ** 1.5
+    normal_radius = WGS84_A / np.sqrt(w)
+
+    x = normal_radius * np.cos(ref) * np.radians(long - ref_long)
+    y = meridian_radius * np.radians(lat - ref_lat)
+    return x, y
+
+#inverse of to_local_m: latitude and longitude of local east/north meters around a reference point
+def from_local_m(x, y, ref_lat, ref_long):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    ref = np.radians(ref_lat)
+    w = 1 - WGS84_E2 * np.sin(ref) ** 2
+    meridian_radius = WGS84_A * (1 - WGS84_E2) / w ** 1.5
+    normal_radius = WGS84_A / np.sqrt(w)
+
+    lat = ref_lat + np.degrees(y / meridian_radius)
+    long = ref_long + np.degrees(x / (normal_radius * np.cos(ref)))
+    return lat, long
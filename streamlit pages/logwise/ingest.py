@@ -0,0 +1,266 @@
+import pandas as pd
+import os
+import glob
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from logwise.geo import distance_m, closest_point
+from logwise.store import write_run
+from logwise.ntpro import read_report, read_metadata, file_info
+from logwise import cache
+from logwise.merge import match_files, merge_streams, step_seconds
+from logwise.simplify import lod_mask
+from logwise.spatial import build_index
+from logwise.swept import swept_path, write_swept
+from logwise.metrics import run_metrics
+from logwise.profiling import Profiler, span
+from logwise.compass import to_compass, direction_label, degrees_to_direction
+
+
+#gets run information from the metadata block of a log file
+def get_file_info(file_name):
+    with open(file_name, 'r', encoding='utf-8-sig') as file:
+        return file_info(read_metadata(file))
+
+#pairs Log- and ShipDynamics files coming from the same exercise
+def pair_files(loaded_files):
+    pairs, _ = match_files(loaded_files)
+    return pairs
+
+#reads, merges and derives one run pair, saves its csv and returns its summary row
+#exact_geodesic refines the closest point to the current station with geopy's geodesic
+#with a profiler, every stage is recorded as a timing span
+def process_run(log, ship, port, current, out_dir='.', exact_geodesic=False, profiler=None):
+    port_lat, port_long = port
+    curr_lat, curr_long = current
+
+    #read the csvs in one pass each, numbers already typed
+    with span(profiler, 'read_report') as s:
+        log_metadata, _, log_df = read_report(log)
+        ship_metadata, _, ship_df = read_report(ship)
+        s['rows'] = len(log_df) + len(ship_df)
+
+    with span(profiler, 'merge_streams') as s:
+        #align the streams on integer seconds, common columns come from the ship stream only
+        df_merged = merge_streams(ship_df, log_df, step_seconds(ship_metadata), step_seconds(log_metadata))
+        df_merged = df_merged.drop(['Local position X', 'Local position Y'], axis=1)
+
+        #drop the first tick (exercise start, all channels zeroed)
+        df_merged = df_merged.iloc[1:].reset_index(drop=True)
+
+        #rename columns
+        df_merged.columns = [c.replace(' ','_').replace("'",'').lower() for c in df_merged.columns]
+        s['rows'] = len(df_merged)
+
+    #get file info
+    finfo = file_info(log_metadata)
+
+    with span(profiler, 'conditions', rows=len(df_merged)):
+        #arrival or departure
+        dist_start, dist_end = distance_m(df_merged['latitude'].values[[0, -1]], df_merged['longitude'].values[[0, -1]], port_lat, port_long)
+        if dist_start>dist_end:
+            finfo['type'] = 'Arrival'
+        else:
+            finfo['type'] = 'Departure'
+
+        #bounding box, so maps of many runs need no track to place themselves
+        finfo['min_lat'] = df_merged['latitude'].min()
+        finfo['max_lat'] = df_merged['latitude'].max()
+        finfo['min_long'] = df_merged['longitude'].min()
+        finfo['max_long'] = df_merged['longitude'].max()
+
+        #create wind rose column
+        df_merged['wrose_wind_direction'] = to_compass(df_merged['true_wind_direction'].values)
+
+        #get wind speed
+        finfo['wind_speed'] = int(df_merged['true_wind_speed'].mean())
+        finfo['wind_gust'] = 0 if finfo['wind_speed']== 0 else (finfo['wind_speed'] + 5)
+
+        #wind, sectors seen during the run in order of appearance
+        finfo['wind_direction'] = int(df_merged['true_wind_direction'].mean())
+        if finfo['wind_speed'] == 0:
+            finfo['wrose_wind_direction'] = 'N/A'
+        else:
+            finfo['wrose_wind_direction'] = direction_label(df_merged['true_wind_direction'].values)
+
+        #wave, distinct values in order of appearance
+        finfo['wind_wave_height'] = ' - '.join(str(float(v)) for v in pd.unique(df_merged['significant_wave_height'].values))
+        finfo['wind_wave_direction'] = ' - '.join(str(float(v)) for v in pd.unique(df_merged['wave_direction'].values))
+
+    with span(profiler, 'closest_point', rows=len(df_merged)):
+        #current
+        finfo['current_location'] = f'{curr_lat}, {curr_long}'
+        #get closest point to current measurement point
+        position, _ = closest_point(df_merged['latitude'].values, df_merged['longitude'].values, curr_lat, curr_long, exact=exact_geodesic)
+        current_point = df_merged.iloc[position]
+        #get values
+        finfo['current_velocity'] = current_point['current_speed']
+        finfo['current_direction'] = current_point['current_direction']
+        finfo['wrose_current_direction'] = degrees_to_direction(current_point['current_direction'])
+
+    with span(profiler, 'run_metrics', rows=len(df_merged)):
+        #manoeuvre KPIs over the whole run
+        finfo.update(run_metrics(df_merged, port))
+
+    with span(profiler, 'to_csv', rows=len(df_merged)):
+        #save modified csv
+        dir = os.path.join(out_dir, finfo['area_name'])
+        os.makedirs(dir, exist_ok=True)
+        finfo['file_name'] = f"{finfo['area_name']} {finfo['exercise']}.csv"
+
+        df_merged.to_csv(f"{dir}/{finfo['file_name']}")
+
+    with span(profiler, 'write_run', rows=len(df_merged)):
+        #simplified track levels for the maps, precomputed once here
+        df_merged['lod_mask'] = lod_mask(df_merged['latitude'].values, df_merged['longitude'].values)
+
+        #distance to the berth of every tick, the common axis of the ensemble comparison
+        df_merged['distance_to_port'] = distance_m(df_merged['latitude'].values, df_merged['longitude'].values, port_lat, port_long)
+
+        #typed columnar copy used by the pages
+        write_run(df_merged, finfo['area_name'], finfo['exercise'], out_dir)
+
+    with span(profiler, 'swept_path', rows=len(df_merged)):
+        #area covered by the hull, drawn on the maps and kept in the summary
+        swept, area = swept_path(df_merged['latitude'].values, df_merged['longitude'].values, df_merged['heading'].values, finfo['ship'])
+        finfo['swept_area'] = int(area)
+        write_swept(swept, finfo['area_name'], finfo['exercise'], out_dir)
+
+    return finfo
+
+#process_run going through the ingestion cache: unchanged pairs are restored instead of parsed again
+def process_run_cached(log, ship, port, current, out_dir='.', exact_geodesic=False, cache_dir=None, profiler=None):
+    if cache_dir is None:
+        return process_run(log, ship, port, current, out_dir, exact_geodesic, profiler)
+
+    with span(profiler, 'cache_lookup') as s:
+        key = cache.run_key(log, ship, port, current, exact_geodesic)
+        finfo = cache.get(key, out_dir, cache_dir)
+        s['hit'] = finfo is not None
+    if finfo is None:
+        finfo = process_run(log, ship, port, current, out_dir, exact_geodesic, profiler)
+        with span(profiler, 'cache_put'):
+            cache.put(key, finfo, out_dir, cache_dir)
+    return finfo
+
+#process_run_cached with its own profiler, so worker processes can send their spans back with the summary row
+#every span is tagged with the run it belongs to
+def profiled_run(log, ship, port, current, out_dir='.', exact_geodesic=False, cache_dir=None, memory=False):
+    profiler = Profiler(memory)
+    with profiler.span('process_run') as s:
+        finfo = process_run_cached(log, ship, port, current, out_dir, exact_geodesic, cache_dir, profiler)
+    s['rows'] = sum(span.get('rows', 0) for span in profiler.spans if span['name'] == 'merge_streams')
+    profiler.close()
+    for record in profiler.spans:
+        record['run'] = finfo['exercise']
+    return finfo, profiler.spans
+
+#failure report entry of a pair that could not be processed
+def pair_error(log, ship, error):
+    return {'log': os.path.basename(log), 'ship': os.path.basename(ship), 'error': f'{type(error).__name__}: {error}'}
+
+#creates summary file with information from all runs, processing the run pairs in parallel
+#progress is called as progress(done, total, finfo) each time a run is finished, finfo being None for a failed pair
+#with an errors list, a pair that fails is reported there and left out instead of aborting the whole load
+#with a cache_dir, runs already processed with the same files and coordinates are reused
+#with a profiler, the stages of every run and of the summary are recorded as timing spans
+def create_summary(loaded_files, port, current, comments=None, out_dir='.', workers=None, progress=None, exact_geodesic=False, cache_dir=None, profiler=None, errors=None):
+    with span(profiler, 'create_summary') as summary_span:
+        pairs = pair_files(loaded_files)
+        rows = [None] * len(pairs)
+
+        #without a profiler the runs go straight through process_run_cached
+        if profiler is None:
+            run, args = process_run_cached, ()
+        else:
+            run, args = profiled_run, (profiler.memory,)
+
+        def finish(i, result):
+            if profiler is None:
+                rows[i] = result
+            else:
+                rows[i], spans = result
+                profiler.extend(spans)
+
+        def fail(i, error):
+            if errors is None:
+                raise error
+            errors.append(pair_error(*pairs[i], error))
+
+        if workers == 1:
+            #run in this process, useful for debugging and as benchmark baseline
+            for i, (log, ship) in enumerate(pairs):
+                try:
+                    finish(i, run(log, ship, port, current, out_dir, exact_geodesic, cache_dir, *args))
+                except Exception as e:
+                    fail(i, e)
+                if progress:
+                    progress(i + 1, len(pairs), rows[i])
+        elif pairs:
+            #spawned workers: forking the threaded streamlit server can deadlock a child on a lock held by another thread
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = {executor.submit(run, log, ship, port, current, out_dir, exact_geodesic, cache_dir, *args): i for i, (log, ship) in enumerate(pairs)}
+                for done, future in enumerate(as_completed(futures), start=1):
+                    try:
+                        finish(futures[future], future.result())
+                    except Exception as e:
+                        fail(futures[future], e)
+                    if progress:
+                        progress(done, len(pairs), rows[futures[future]])
+
+        if cache_dir is not None:
+            with span(profiler, 'cache_evict'):
+                cache.evict(cache_dir)
+
+        #keep the upload order so the summary matches a sequential load
+        rows = [row for row in rows if row is not None]
+        df_all_runs = pd.DataFrame(rows)
+
+        #track points of every run of an area in one spatial index, for proximity queries
+        for area_name, df_area in df_all_runs.groupby('area_name', sort=False) if rows else []:
+            with span(profiler, 'spatial_index', area=area_name, runs=len(df_area)):
+                build_index(area_name, df_area['exercise'], out_dir)
+
+        with span(profiler, 'write_summary', runs=len(df_all_runs)):
+            if comments and rows:
+                df_comments = pd.read_csv(comments, sep=';')
+                df_all_runs = pd.merge(df_all_runs, df_comments, on='exercise')
+
+            #save next to the runs of the last area, as before
+            dir = os.path.join(out_dir, rows[-1]['area_name']) if rows else out_dir
+            df_all_runs.to_csv(f"{dir}/Runs Summary.csv")
+        summary_span['runs'] = len(df_all_runs)
+    return df_all_runs
+
+#port and current coordinates per area from a text file of 'name value area' lines
+#(port_lat, port_long, curr_lat, curr_long), as in 'port and current coordinates.txt'
+#returns {area: ((port_lat, port_long), (curr_lat, curr_long))}
+def read_coordinates(file_name):
+    values = {}
+    with open(file_name, 'r', encoding='utf-8-sig') as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) < 2 or parts[0].startswith('#'):
+                continue
+            area = ' '.join(parts[2:]).lower()
+            values.setdefault(area, {})[parts[0].lower()] = float(parts[1])
+
+    coordinates = {}
+    for area, v in values.items():
+        missing = [k for k in ('port_lat', 'port_long', 'curr_lat', 'curr_long') if k not in v]
+        if missing:
+            raise ValueError(f"{file_name}: missing {', '.join(missing)} for area '{area}'")
+        coordinates[area] = ((v['port_lat'], v['port_long']), (v['curr_lat'], v['curr_long']))
+    return coordinates
+
+#summary written by a previous create_summary into out_dir, the most recent one if several areas hold one
+def find_summary(out_dir='.'):
+    summaries = glob.glob(os.path.join(out_dir, '*', 'Runs Summary.csv'))
+    return max(summaries, key=os.path.getmtime) if summaries else None
+
+#prebuilt summary of out_dir, as returned by create_summary
+def load_summary(out_dir='.'):
+    path = find_summary(out_dir)
+    if path is None:
+        raise FileNotFoundError(f'No Runs Summary.csv found in {out_dir}')
+    #only empty cells are missing, 'N/A' is the wind direction of calm runs
+    return pd.read_csv(path, index_col=0, keep_default_na=False, na_values=[''])
@@ -0,0 +1,135 @@
+import threading
+import time
+import pandas as pd
+import streamlit as st
+from logwise.ingest import create_summary
+
+#ingestion as a background job: create_summary runs in a thread of the streamlit server while the pages keep working,
+#the runs finished so far are put in the session as they come in and pairs that fail are kept in an error report
+
+
+class IngestJob:
+    def __init__(self, loaded_files, port, current, comments=None, out_dir='.', **options):
+        self.out_dir = out_dir
+        self.lock = threading.Lock()
+        self.rows = []
+        self.errors = []
+        self.done = 0
+        self.total = 0
+        self.summary = None
+        self.failure = None
+        self.started = time.time()
+        self.finished = None
+        #merged into the partial summaries the same way create_summary merges it into the final one, read by the job
+        self.comments = None
+        self.thread = threading.Thread(target=self.run, args=(loaded_files, port, current, comments, out_dir, options), name='logwise-ingest', daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def run(self, loaded_files, port, current, comments, out_dir, options):
+        try:
+            self.comments = pd.read_csv(comments, sep=';') if comments else None
+            summary = create_summary(loaded_files, port, current, comments=comments, out_dir=out_dir, progress=self.progress, errors=self.errors, **options)
+        except Exception as e:
+            #failures outside the runs themselves, e.g. a malformed comments file or the summary write
+            with self.lock:
+                self.failure = f'{type(e).__name__}: {e}'
+        else:
+            with self.lock:
+                self.summary = summary
+        finally:
+            self.finished = time.time()
+
+    #progress callback of create_summary, called from the job thread
+    def progress(self, done, total, finfo):
+        with self.lock:
+            self.done, self.total = done, total
+            if finfo is not None:
+                self.rows.append(finfo)
+
+    @property
+    def running(self):
+        return self.finished is None
+
+    #changes each time more runs are ready, and once more when the complete summary is
+    def version(self):
+        with self.lock:
+            return len(self.rows), self.summary is not None
+
+    #summary of the runs finished so far in completion order, the complete one once the job is over
+    def runs(self):
+        with self.lock:
+            if self.summary is not None:
+                return self.summary
+            rows = list(self.rows)
+        df_runs = pd.DataFrame(rows)
+        if self.comments is not None and rows:
+            df_runs = pd.merge(df_runs, self.comments, on='exercise')
+        return df_runs
+
+    #pairs that could not be processed, one row per pair
+    def error_report(self):
+        return pd.DataFrame(list(self.errors), columns=['log', 'ship', 'error'])
+
+
+#puts the job's runs in the session when more finished since the last check
+def sync_session():
+    job = st.session_state.get('ingest_job')
+    if job is None:
+        return
+    version = job.version()
+    if version == st.session_state.get('ingest_job_version'):
+        return
+    st.session_state.ingest_job_version = version
+    df_runs = job.runs()
+    if len(df_runs) == 0:
+        return
+    st.session_state.df_runs = df_runs
+    st.session_state.df_initial = df_runs
+    st.session_state.out_dir = job.out_dir
+
+#whether runs are still being loaded in the background
+def job_running():
+    job = st.session_state.get('ingest_job')
+    return job is not None and job.running
+
+#widgets whose options come from the runs are keyed, and their value is carried over to the options of each job update:
+#a selection keeps the values still offered
+def keep_selection(key, options):
+    if key in st.session_state:
+        st.session_state[key] = [v for v in st.session_state[key] if v in options]
+
+#a range narrowed by the user is clamped to the new bounds, one left at the full range follows them
+def keep_range(key, low, high):
+    bounds = st.session_state.get(f'{key}_bounds')
+    if key in st.session_state and bounds is not None and tuple(st.session_state[key]) != bounds:
+        selected_low, selected_high = st.session_state[key]
+        st.session_state[key] = (min(max(selected_low, low), high), max(min(selected_high, high), low))
+    else:
+        st.session_state[key] = (low, high)
+    st.session_state[f'{key}_bounds'] = (low, high)
+
+#progress of the running job in the sidebar
+def job_progress(job):
+    with st.sidebar:
+        st.progress(job.done / job.total if job.total else 0.0, text=f'Loading runs ({job.done}/{job.total or "?"})')
+        if job.errors:
+            st.caption(f'{len(job.errors)} failed, see Load Data')
+        #runs finishing while the page is idle show up on the next interaction, or right away with this
+        st.button('Refresh', key='job_refresh')
+
+#keeps a page in step with the background job: its runs in the session and its progress in the sidebar
+def follow_job():
+    sync_session()
+    job = st.session_state.get('ingest_job')
+    if job is not None and job.running:
+        job_progress(job)
+
+#called at the end of a page: runs that finished while it was drawn are put in the session right away,
+#otherwise the page is left alone until the next interaction or refresh
+def poll_job():
+    job = st.session_state.get('ingest_job')
+    if job is not None and job.version() != st.session_state.get('ingest_job_version'):
+        st.rerun()
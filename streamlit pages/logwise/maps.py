@@ -0,0 +1,98 @@
+import folium
+import numpy as np
+from shapely.geometry import mapping
+from logwise.store import read_run
+from logwise.swept import read_swept
+from logwise.simplify import lod_level, select_lod
+
+#summary fields used by the tooltip, the click handler and the line style
+FEATURE_PROPERTIES = ['exercise', 'type']
+ROUTE_COLORS = {'Arrival': 'red', 'Departure': 'blue'}
+
+
+#bounds of a set of runs, from the per-run bounding boxes stored in the summary
+def runs_bounds(df):
+    return df['min_lat'].min(), df['max_lat'].max(), df['min_long'].min(), df['max_long'].max()
+
+#simplified (longitude, latitude) track of a run, from the run cache when one is given
+def route_track(row, level, out_dir='.', cache=None):
+    if cache is not None:
+        return cache.get(row['area_name'], row['exercise'], out_dir).track(level)
+    track = select_lod(read_run(row['area_name'], row['exercise'], ['latitude', 'longitude', 'lod_mask'], out_dir), level)
+    return np.column_stack([track['longitude'].values, track['latitude'].values])
+
+#all runs as a single FeatureCollection of LineStrings at one level of detail
+def routes_geojson(df, level, out_dir='.', cache=None):
+    features = []
+    for row in df.to_dict('records'):
+        features.append({
+            'type': 'Feature',
+            'id': row['exercise'],
+            'geometry': {
+                'type': 'LineString',
+                'coordinates': route_track(row, level, out_dir, cache).tolist(),
+            },
+            'properties': {col:row[col] for col in FEATURE_PROPERTIES},
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+#swept paths of the runs of df that have one, as a FeatureCollection of polygons
+def swept_geojson(df, out_dir='.'):
+    features = []
+    for row in df.to_dict('records'):
+        swept = read_swept(row['area_name'], row['exercise'], out_dir)
+        if swept is None:
+            continue
+        features.append({
+            'type': 'Feature',
+            'id': row['exercise'],
+            'geometry': mapping(swept),
+            'properties': {col:row[col] for col in FEATURE_PROPERTIES},
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+#line style set by the run type property
+def route_style(feature):
+    return {'color': ROUTE_COLORS.get(feature['properties']['type'], 'blue'), 'weight': 1, 'opacity': 0.8}
+
+def route_highlight(feature):
+    return {'weight': 3}
+
+#light fill in the run type color, under the routes
+def swept_style(feature):
+    color = ROUTE_COLORS.get(feature['properties']['type'], 'blue')
+    return {'color': color, 'fillColor': color, 'weight': 0.5, 'fillOpacity': 0.1}
+
+#zoom the maps open at, and the zoom the pages store for them until the map reports another one
+MAP_ZOOM = 13
+
+#base map of a set of runs, depending only on the runs so zooming, panning or a change of detail never remounts it
+def routes_base_map(df, zoom=MAP_ZOOM):
+    min_lat, max_lat, min_long, max_long = runs_bounds(df)
+    return folium.Map(location=[(min_lat + max_lat) / 2, (min_long + max_long) / 2], zoom_start=zoom, scrollWheelZoom=True, tiles='CartoDB positron')
+
+#every run of df in one GeoJson layer, detail picked for the zoom
+#with swept=True the swept paths of the runs are drawn underneath, in a second layer
+def routes_layer(df, zoom, out_dir='.', cache=None, swept=False):
+    min_lat, max_lat, _, _ = runs_bounds(df)
+    layer = folium.FeatureGroup(name='routes')
+
+    if swept:
+        folium.GeoJson(swept_geojson(df, out_dir), name='swept paths', style_function=swept_style, interactive=False).add_to(layer)
+
+    level = lod_level(zoom, (min_lat + max_lat) / 2)
+    folium.GeoJson(
+        routes_geojson(df, level, out_dir, cache),
+        name='routes',
+        style_function=route_style,
+        highlight_function=route_highlight,
+        smooth_factor=1,
+        tooltip=folium.GeoJsonTooltip(['exercise'], labels=False),
+    ).add_to(layer)
+    return layer
+
+#map with every run of df as one folium document, e.g. for the benchmarks
+def build_routes_map(df, zoom, out_dir='.', cache=None, swept=False):
+    map = routes_base_map(df, zoom)
+    routes_layer(df, zoom, out_dir, cache, swept).add_to(map)
+    return map
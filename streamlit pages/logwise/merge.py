@@ -0,0 +1,68 @@
+import os
+import numpy as np
+import pandas as pd
+
+#pairs Log- and ShipDynamics streams by exercise key and aligns them on integer seconds
+
+
+#key shared by the two files of an exercise: the file name without the 'Log-'/'ShipDynamics-' marker
+def exercise_key(file_name):
+    return os.path.basename(file_name).replace('Log-', '').replace('ShipDynamics-', '')
+
+#matches every Log- file with the ShipDynamics file of the same exercise, whatever the upload order
+#returns the pairs (in log order) and the files left without a partner
+def match_files(loaded_files):
+    ship_files = {exercise_key(n): n for n in loaded_files if 'ShipDynamics' in n}
+    pairs = []
+    unpaired = []
+    for n in loaded_files:
+        if 'Log-' not in n:
+            continue
+        ship = ship_files.pop(exercise_key(n), None)
+        if ship is None:
+            unpaired.append(n)
+        else:
+            pairs.append((n, ship))
+    unpaired.extend(ship_files.values())
+    return pairs, unpaired
+
+#'HH:MM:SS' strings to integer seconds, for the whole column at once
+def time_to_seconds(time):
+    parts = time.str.split(':', expand=True).astype(np.int64)
+    return (parts[0] * 3600 + parts[1] * 60 + parts[2]).astype(np.int32)
+
+#integer seconds back to 'HH:MM:SS'
+def seconds_to_time(seconds):
+    seconds = int(seconds)
+    return f'{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}'
+
+#integer seconds back to 'HH:MM:SS', for a whole column
+def seconds_to_times(seconds):
+    seconds = pd.Series(np.asarray(seconds, dtype=np.int64))
+    hours = (seconds // 3600).map('{:02d}'.format)
+    return hours.str.cat([(seconds % 3600 // 60).map('{:02d}'.format), (seconds % 60).map('{:02d}'.format)], sep=':').values
+
+#logging step in seconds from a report's metadata block
+def step_seconds(metadata):
+    try:
+        return max(float(metadata.get('Step (sec)', 1)), 1.0)
+    except ValueError:
+        return 1.0
+
+#joins the log stream onto the ship stream with a sorted as-of alignment on integer seconds
+#each ship tick takes the nearest log tick within one logging step, so different steps or dropped ticks still line up
+#columns present in both streams are only taken from the ship stream
+def merge_streams(ship_df, log_df, ship_step=1.0, log_step=1.0):
+    ship_df = ship_df.assign(seconds=time_to_seconds(ship_df['time'])).sort_values('seconds', kind='stable')
+    log_columns = [c for c in log_df.columns if c not in ship_df.columns]
+    log_df = log_df[log_columns].assign(seconds=time_to_seconds(log_df['time']))
+    log_df = log_df.assign(log_seconds=log_df['seconds']).sort_values('seconds', kind='stable')
+
+    df_merged = pd.merge_asof(ship_df, log_df, on='seconds', direction='nearest', tolerance=int(np.ceil(max(ship_step, log_step))))
+
+    #ship ticks with no log tick close enough are dropped, as the previous inner join did
+    df_merged = df_merged[df_merged['log_seconds'].notna()].drop(columns='log_seconds')
+
+    #keep time and seconds side by side at the front
+    columns = ['time', 'seconds'] + [c for c in df_merged.columns if c not in ('time', 'seconds')]
+    return df_merged[columns].reset_index(drop=True)
@@ -0,0 +1,62 @@
+import numpy as np
+from logwise.geo import distance_m
+
+#per-run manoeuvre KPIs computed at ingest over the whole merged frame, stored as summary columns
+
+#radii around the port point for the speed metrics, in meters
+PORT_RADII_M = (500, 1000, 2000)
+
+#a tick counts as swinging when turning at least this fast (degrees per minute) at or below this speed (knots)
+SWING_MIN_RATE_OF_TURN = 10.0
+SWING_MAX_SOG = 2.0
+
+
+#channel as a float array, all NaN when the log does not have it
+def channel(df, column):
+    if column in df.columns:
+        return df[column].values.astype(float)
+    return np.full(len(df), np.nan)
+
+def nanmax_abs(values):
+    return float(np.nanmax(np.abs(values))) if np.any(~np.isnan(values)) else np.nan
+
+#duration of every tick in seconds, the last tick lasting as long as the one before it
+def tick_durations(seconds):
+    seconds = np.asarray(seconds, dtype=float)
+    if len(seconds) < 2:
+        return np.ones(len(seconds))
+    dt = np.diff(seconds)
+    return np.append(dt, dt[-1])
+
+#KPIs of one run, as a dict of summary columns
+def run_metrics(df, port):
+    dt = tick_durations(df['seconds'].values)
+    sog = channel(df, 'sog')
+    rate_of_turn = channel(df, 'rate_of_turn')
+    metrics = {}
+
+    #under keel clearance
+    metrics['min_ukc_fwd'] = float(np.nanmin(channel(df, 'under_keel_clearance_fwd')))
+    metrics['min_ukc_aft'] = float(np.nanmin(channel(df, 'under_keel_clearance_aft')))
+
+    #speed close to the berth
+    distance = distance_m(df['latitude'].values, df['longitude'].values, *port)
+    for radius in PORT_RADII_M:
+        inside = (distance <= radius) & ~np.isnan(sog)
+        metrics[f'max_sog_{radius}m'] = float(sog[inside].max()) if inside.any() else np.nan
+        metrics[f'mean_sog_{radius}m'] = float(sog[inside].mean()) if inside.any() else np.nan
+
+    #turning
+    metrics['peak_rate_of_turn'] = nanmax_abs(rate_of_turn)
+    swinging = (np.abs(rate_of_turn) >= SWING_MIN_RATE_OF_TURN) & (sog <= SWING_MAX_SOG)
+    metrics['time_in_swing'] = float(dt[swinging].sum())
+
+    #thruster use, gained power integrated over time (gained power unit x seconds)
+    metrics['bow_thruster_energy'] = float(np.nansum(np.abs(channel(df, 'bow_thruster_gained_power')) * dt))
+    metrics['stern_thruster_energy'] = float(np.nansum(np.abs(channel(df, 'stern_thruster_gained_power')) * dt))
+
+    #transverse speeds
+    metrics['max_transverse_speed_bow'] = nanmax_abs(channel(df, 'transverse_speed_at_ships_bow'))
+    metrics['max_transverse_speed_stern'] = nanmax_abs(channel(df, 'transverse_speed_at_ships_stern'))
+
+    return {k: round(v, 2) for k, v in metrics.items()}
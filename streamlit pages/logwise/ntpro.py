@@ -0,0 +1,39 @@
+import csv
+import pandas as pd
+
+#reader for the csv files exported by the NTPro Report Generator:
+#a metadata block ('Key: value' lines), a blank line, the column names, a units row and the data rows,
+#with every number quoted and grouped with commas ("4,230.48")
+
+#columns that hold text instead of numbers
+TEXT_COLUMNS = ['time', 'Autopilot state']
+
+
+#reads the metadata block from an open file, stopping at the blank line after it
+def read_metadata(file):
+    metadata = {}
+    for line in file:
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            break
+        key, _, value = line.partition(':')
+        metadata[key.strip()] = value.strip()
+    return metadata
+
+#reads a whole report in one pass
+#returns the metadata dict, a {column: unit} dict and a frame with float64 numeric columns
+def read_report(file_name):
+    with open(file_name, 'r', encoding='utf-8-sig', newline='') as file:
+        metadata = read_metadata(file)
+        columns = next(csv.reader([file.readline()]))
+        units = dict(zip(columns, next(csv.reader([file.readline()]))))
+
+        #the rest of the stream goes straight to the C parser, which strips the thousands separators
+        dtypes = {c: (str if c in TEXT_COLUMNS else 'float64') for c in columns}
+        df = pd.read_csv(file, header=None, names=columns, dtype=dtypes, thousands=',', float_precision='round_trip')
+
+    return metadata, units, df
+
+#run information from the metadata block, with the keys used in the runs summary
+def file_info(metadata):
+    return {'ship':metadata.get('OS', ''), 'trainee':metadata.get('Trainee', ''), 'exercise':metadata.get('Exercise name', '').replace('.nti',''), 'area_name':metadata.get('Area', ''), 'exercise_start_time':metadata.get('Exercise start time', ''), 'exercise_date':metadata.get('Exercise date', ''), 'ship_model_version':metadata.get('Model version', '')}
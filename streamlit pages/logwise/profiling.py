@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+#named timing spans for the ingestion stages and the page builds
+#a span records its duration, any fields given to it (run, rows, ...) and, when memory tracing is on,
+#the peak traced memory while it was open; spans can be exported as JSON lines to follow regressions
+
+#spans open in each thread, shared by all profilers so nested spans keep their peaks
+open_spans = threading.local()
+
+
+class Profiler:
+    def __init__(self, memory=False):
+        self.spans = []
+        self.memory = memory
+        self.lock = threading.Lock()
+        self.started_tracing = False
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+
+    #times the block; the yielded dict takes extra fields such as row counts
+    @contextmanager
+    def span(self, name, **fields):
+        stack = open_spans.__dict__.setdefault('stack', [])
+        record = {'name': name, **fields}
+        if self.memory:
+            #the peak is reset per span, the enclosing span keeps the peak seen so far
+            if stack:
+                stack[-1]['_peak'] = max(stack[-1]['_peak'], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            record['_peak'] = 0
+        stack.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            stack.pop()
+            if self.memory:
+                peak = max(record.pop('_peak'), tracemalloc.get_traced_memory()[1])
+                record['peak_mb'] = peak / 1024 ** 2
+                if stack:
+                    stack[-1]['_peak'] = max(stack[-1]['_peak'], peak)
+            record['started'] = time.time() - record['seconds']
+            with self.lock:
+                self.spans.append(record)
+
+    #spans recorded elsewhere, e.g. in a worker process
+    def extend(self, spans):
+        with self.lock:
+            self.spans.extend(spans)
+
+    def clear(self):
+        with self.lock:
+            self.spans.clear()
+
+    #spans as JSON lines, one object per span
+    def to_jsonl(self):
+        with self.lock:
+            return ''.join(json.dumps(span, default=str) + '\n' for span in self.spans)
+
+    #appends the spans to a JSON lines file
+    def write_jsonl(self, path):
+        with open(path, 'a') as file:
+            file.write(self.to_jsonl())
+
+    #stops the memory tracing this profiler started
+    def close(self):
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+#span of a profiler that may be None, so instrumented code needs no branch when profiling is off
+def span(profiler, name, **fields):
+    if profiler is None:
+        return no_span()
+    return profiler.span(name, **fields)
+
+@contextmanager
+def no_span():
+    yield {}
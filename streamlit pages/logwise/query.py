@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+#query engine over the runs summary: every indexed column is factorized once into categorical codes
+#and each distinct value gets a packed bitmap of the runs holding it, so a filter combination is
+#resolved with bitwise OR (values of one column) and AND (across columns) on n/8 bytes per bitmap
+#continuous columns (range_columns) are kept sorted instead, a range becomes a bitmap with two binary searches
+
+
+class RunIndex:
+    def __init__(self, df, columns, range_columns=()):
+        self.df = df
+        self.size = len(df)
+        self.values = {}
+        self.bitmaps = {}
+        for column in columns:
+            codes, uniques = pd.factorize(df[column], use_na_sentinel=False)
+            self.values[column] = list(uniques)
+            self.bitmaps[column] = [np.packbits(codes == code) for code in range(len(uniques))]
+
+        self.sorted_values = {}
+        self.sorted_rows = {}
+        for column in range_columns:
+            if column not in df:
+                continue
+            values = pd.to_numeric(df[column], errors='coerce').values.astype(float)
+            rows = np.argsort(values, kind='stable')
+            #NaN sorts last and never falls inside a range
+            rows = rows[~np.isnan(values[rows])]
+            self.sorted_rows[column] = rows
+            self.sorted_values[column] = values[rows]
+
+    #distinct values of a column, in order of first appearance
+    def options(self, column):
+        return self.values[column]
+
+    #smallest and largest value of a numeric column
+    def value_range(self, column):
+        if column in self.sorted_values:
+            values = self.sorted_values[column]
+            return (values[0], values[-1]) if len(values) else (np.nan, np.nan)
+        values = [v for v in self.values[column] if not pd.isna(v)]
+        return min(values), max(values)
+
+    #runs holding any of the values
+    def bitmap(self, column, values):
+        result = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        for position, value in enumerate(self.values[column]):
+            if value in values or (pd.isna(value) and any(pd.isna(v) for v in values)):
+                result |= self.bitmaps[column][position]
+        return result
+
+    #runs with a numeric value between low and high (inclusive)
+    def range_bitmap(self, column, low, high):
+        if column in self.sorted_values:
+            values = self.sorted_values[column]
+            mask = np.zeros(self.size, dtype=bool)
+            mask[self.sorted_rows[column][np.searchsorted(values, low, 'left'):np.searchsorted(values, high, 'right')]] = True
+            return np.packbits(mask)
+        return self.bitmap(column, [v for v in self.values[column] if not pd.isna(v) and low <= v <= high])
+
+    #summary rows matching every filter
+    #selections maps columns to the accepted values (empty or missing means all), ranges maps columns to (low, high)
+    def query(self, selections=None, ranges=None):
+        result = np.full((self.size + 7) // 8, 0xFF, dtype=np.uint8)
+        for column, values in (selections or {}).items():
+            if values:
+                result &= self.bitmap(column, values)
+        for column, (low, high) in (ranges or {}).items():
+            result &= self.range_bitmap(column, low, high)
+        mask = np.unpackbits(result, count=self.size).astype(bool)
+        return self.df[mask]
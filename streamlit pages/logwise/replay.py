@@ -0,0 +1,201 @@
+import json
+import numpy as np
+from logwise.merge import seconds_to_time
+
+#client-side replay of one or more runs: the tracks and channel timelines are sent to the browser once,
+#as column arrays indexed by elapsed second, and a small Leaflet player moves the ship icons,
+#rotates them to the heading and updates the readouts, with no round-trip to the server per frame
+
+#channels shown in the readouts, with their labels and decimals
+REPLAY_CHANNELS = [
+    ('sog', 'SOG (kn)', 1), ('heading', 'Heading', 1), ('rate_of_turn', 'ROT (°/min)', 1),
+    ('under_keel_clearance_fwd', 'UKC fwd (m)', 2), ('under_keel_clearance_aft', 'UKC aft (m)', 2),
+    ('bow_thruster_gained_power', 'Bow thr.', 0), ('stern_thruster_gained_power', 'Stern thr.', 0),
+    ('true_wind_speed', 'Wind (kn)', 1), ('current_speed', 'Current (kn)', 1),
+]
+REPLAY_COLUMNS = ['seconds', 'latitude', 'longitude'] + [c for c, _, _ in REPLAY_CHANNELS]
+
+#playback speeds offered by the player, in simulated seconds per real second
+REPLAY_SPEEDS = [1, 2, 5, 10, 20, 60]
+REPLAY_COLORS = ['red', 'blue', 'green', 'purple', 'orange', 'black']
+
+
+#timeline of one run: elapsed seconds from its first tick plus rounded positions and channels
+def run_timeline(label, color, df):
+    seconds = df['seconds'].values.astype(np.int64)
+    timeline = {
+        'label': label,
+        'color': color,
+        'start': seconds_to_time(seconds[0]),
+        't': (seconds - seconds[0]).tolist(),
+        'lat': np.round(df['latitude'].values, 6).tolist(),
+        'lon': np.round(df['longitude'].values, 6).tolist(),
+        'channels': {},
+    }
+    for column, _, decimals in REPLAY_CHANNELS:
+        if column in df:
+            values = np.round(df[column].values.astype(float), decimals)
+            timeline['channels'][column] = [None if np.isnan(v) else v for v in values.tolist()]
+    return timeline
+
+#html document of the player for the given run timelines
+def replay_html(timelines, speed=10, height=520):
+    config = {
+        'runs': timelines,
+        'channels': [{'column': c, 'label': label} for c, label, _ in REPLAY_CHANNELS],
+        'speeds': REPLAY_SPEEDS,
+        'speed': speed,
+        'height': height,
+    }
+    #run labels come from the log file names, so '</' is escaped to keep them from closing the script
+    return REPLAY_TEMPLATE.replace('__CONFIG__', json.dumps(config, separators=(',', ':')).replace('</', '<\\/'))
+
+
+REPLAY_TEMPLATE = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.css"/>
+<script src="https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.js"></script>
+<style>
+  body { margin: 0; font-family: sans-serif; font-size: 13px; }
+  #map { width: 100%; }
+  #controls { display: flex; align-items: center; gap: 8px; padding: 6px 0; }
+  #timeline { flex: 1; }
+  #clock { font-variant-numeric: tabular-nums; min-width: 70px; }
+  table { border-collapse: collapse; width: 100%; }
+  th, td { padding: 2px 6px; text-align: right; border-bottom: 1px solid #eee; font-variant-numeric: tabular-nums; }
+  th:first-child, td:first-child { text-align: left; }
+  .ship { background: none; border: none; }
+</style>
+</head>
+<body>
+<div id="map"></div>
+<div id="controls">
+  <button id="play">&#9654; Play</button>
+  <select id="speed"></select>
+  <input id="timeline" type="range" min="0" value="0" step="1">
+  <span id="clock">00:00:00</span>
+</div>
+<table id="readouts"></table>
+<script>
+const config = __CONFIG__;
+const runs = config.runs;
+document.getElementById('map').style.height = (config.height - 40 - 24 * (runs.length + 1)) + 'px';
+
+const map = L.map('map', {scrollWheelZoom: true});
+L.tileLayer('https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}{r}.png', {
+  attribution: '&copy; OpenStreetMap contributors &copy; CARTO', subdomains: 'abcd', maxZoom: 20
+}).addTo(map);
+
+//ship icon pointing north, rotated to the heading
+function shipIcon(color, heading) {
+  return L.divIcon({
+    className: 'ship', iconSize: [22, 22], iconAnchor: [11, 11],
+    html: `<svg width="22" height="22" viewBox="-11 -11 22 22" style="transform: rotate(${heading || 0}deg)">` +
+          `<path d="M0,-10 L6,8 L0,4 L-6,8 Z" fill="${color}" stroke="white" stroke-width="1.5"/></svg>`
+  });
+}
+
+let end = 0;
+const bounds = L.latLngBounds([]);
+runs.forEach(run => {
+  const points = run.lat.map((lat, i) => [lat, run.lon[i]]);
+  L.polyline(points, {color: run.color, weight: 1, opacity: 0.6}).addTo(map);
+  points.forEach(p => bounds.extend(p));
+  run.marker = L.marker(points[0], {icon: shipIcon(run.color, (run.channels.heading || [0])[0])}).addTo(map);
+  run.marker.bindTooltip(run.label);
+  end = Math.max(end, run.t[run.t.length - 1]);
+});
+map.fitBounds(bounds, {padding: [20, 20]});
+
+//readouts table, one row per run, labels set as text
+const table = document.getElementById('readouts');
+const channels = config.channels.filter(c => runs.some(run => c.column in run.channels));
+function cell(row, tag, text) {
+  const element = document.createElement(tag);
+  element.textContent = text;
+  row.appendChild(element);
+  return element;
+}
+const header = table.insertRow();
+['Run', 'Time'].concat(channels.map(c => c.label)).forEach(label => cell(header, 'th', label));
+runs.forEach((run, r) => {
+  const row = table.insertRow();
+  cell(row, 'td', run.label).style.color = run.color;
+  cell(row, 'td', '').id = `time-${r}`;
+  channels.forEach(c => { cell(row, 'td', '').id = `value-${r}-${c.column}`; });
+});
+
+//last tick at or before an elapsed second
+function tickAt(run, t) {
+  let low = 0, high = run.t.length - 1;
+  if (t >= run.t[high]) return high;
+  while (low < high) {
+    const mid = (low + high + 1) >> 1;
+    if (run.t[mid] <= t) low = mid; else high = mid - 1;
+  }
+  return low;
+}
+
+function clockText(s) {
+  s = Math.floor(s);
+  return [Math.floor(s / 3600), Math.floor(s % 3600 / 60), s % 60].map(v => String(v).padStart(2, '0')).join(':');
+}
+
+const slider = document.getElementById('timeline');
+const clock = document.getElementById('clock');
+slider.max = end;
+let elapsed = 0;
+let lastTicks = runs.map(() => -1);
+
+function show(t) {
+  elapsed = Math.min(Math.max(t, 0), end);
+  slider.value = Math.floor(elapsed);
+  clock.textContent = clockText(elapsed);
+  runs.forEach((run, r) => {
+    const i = tickAt(run, elapsed);
+    if (i === lastTicks[r]) return;
+    lastTicks[r] = i;
+    run.marker.setLatLng([run.lat[i], run.lon[i]]);
+    run.marker.setIcon(shipIcon(run.color, (run.channels.heading || [])[i]));
+    document.getElementById(`time-${r}`).textContent = clockText(run.t[i]);
+    channels.forEach(c => {
+      const values = run.channels[c.column];
+      const value = values ? values[i] : null;
+      document.getElementById(`value-${r}-${c.column}`).textContent = value === null || value === undefined ? '-' : value;
+    });
+  });
+}
+
+//playback clock driven by animation frames, advancing `speed` simulated seconds per real second
+const speed = document.getElementById('speed');
+config.speeds.forEach(s => speed.add(new Option(s + 'x', s, false, s === config.speed)));
+const play = document.getElementById('play');
+let playing = false, previous = null;
+
+function frame(now) {
+  if (!playing) return;
+  if (previous !== null) show(elapsed + (now - previous) / 1000 * Number(speed.value));
+  previous = now;
+  if (elapsed >= end) { toggle(); return; }
+  requestAnimationFrame(frame);
+}
+
+function toggle() {
+  playing = !playing;
+  previous = null;
+  play.innerHTML = playing ? '&#10074;&#10074; Pause' : '&#9654; Play';
+  if (playing) {
+    if (elapsed >= end) show(0);
+    requestAnimationFrame(frame);
+  }
+}
+
+play.addEventListener('click', toggle);
+slider.addEventListener('input', () => show(Number(slider.value)));
+show(0);
+</script>
+</body>
+</html>
+'''
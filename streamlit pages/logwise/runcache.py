@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import streamlit as st
+from logwise.store import read_run, run_modified
+from logwise.simplify import select_lod
+from logwise.timeindex import time_index
+from logwise.compact import CompactRun
+
+#process-wide cache of loaded runs shared by every page and session, keyed by area/exercise and partition mtime
+#holds the typed run frame plus artifacts derived from it, evicting least recently used runs past a memory budget
+RUN_CACHE_MAX_BYTES = 512 * 1024 ** 2
+
+
+#a loaded run and its derived artifacts
+#the channels are held in compact form (see compact.py) and decoded on access, so keep the decoded frame for the rerun
+class CachedRun:
+    def __init__(self, frame):
+        self.compact = CompactRun(frame)
+        self.rows = len(frame)
+        self.bounds = (frame['latitude'].min(), frame['latitude'].max(), frame['longitude'].min(), frame['longitude'].max())
+        self.time_index = time_index(frame['seconds'].values)
+        self.tracks = {}
+        self.decoded_nbytes = int(frame.memory_usage(deep=True).sum())
+        self.nbytes = self.compact.nbytes + self.time_index.nbytes
+
+    #decoded frame of every channel
+    @property
+    def frame(self):
+        return self.compact.frame()
+
+    #decoded frame of only some channels, those missing from the run are left out
+    def columns(self, names):
+        return self.compact.frame(names)
+
+    #simplified (longitude, latitude) track at a level of detail, built on first use
+    def track(self, level):
+        if level not in self.tracks:
+            points = select_lod(self.columns(['latitude', 'longitude', 'lod_mask']), level)
+            self.tracks[level] = np.column_stack([points['longitude'].values, points['latitude'].values])
+            self.nbytes += self.tracks[level].nbytes
+        return self.tracks[level]
+
+
+class RunCache:
+    def __init__(self, max_bytes=RUN_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.runs = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    #cached run, loaded from the run store on a miss or when the partition was written again
+    def get(self, area_name, exercise, out_dir='.'):
+        key = (out_dir, area_name, exercise, run_modified(area_name, exercise, out_dir))
+        with self.lock:
+            if key in self.runs:
+                self.hits += 1
+                self.runs.move_to_end(key)
+                return self.runs[key]
+
+        run = CachedRun(read_run(area_name, exercise, out_dir=out_dir))
+        with self.lock:
+            self.misses += 1
+            #older copies of the same run are stale
+            for stale in [k for k in self.runs if k[:3] == key[:3]]:
+                del self.runs[stale]
+            self.runs[key] = run
+            self.evict()
+        return run
+
+    #drops least recently used runs until the budget is met, always keeping the newest one
+    def evict(self):
+        while len(self.runs) > 1 and self.nbytes() > self.max_bytes:
+            self.runs.popitem(last=False)
+            self.evictions += 1
+
+    def nbytes(self):
+        return sum(run.nbytes for run in self.runs.values())
+
+    def clear(self):
+        with self.lock:
+            self.runs.clear()
+
+    #counters for the diagnostics page
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'runs': len(self.runs), 'memory_mb': self.nbytes() / 1024 ** 2, 'budget_mb': self.max_bytes / 1024 ** 2, 'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0, 'evictions': self.evictions}
+
+    #cached runs from most to least recently used
+    def contents(self):
+        with self.lock:
+            return [{'area_name': key[1], 'exercise': key[2], 'rows': run.rows, 'memory_mb': run.nbytes / 1024 ** 2, 'decoded_mb': run.decoded_nbytes / 1024 ** 2, 'tracks': sorted(run.tracks)} for key, run in reversed(self.runs.items())]
+
+
+#the single cache instance of this streamlit server
+@st.cache_resource
+def run_cache():
+    return RunCache()
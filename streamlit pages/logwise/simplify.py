@@ -0,0 +1,62 @@
+import numpy as np
+from logwise.geo import to_local_m
+
+#track level of detail: each point gets a bitmask (lod_mask) with bit i set when the point survives
+#Douglas-Peucker simplification at LOD_TOLERANCES_M[i], level 0 being the coarsest
+LOD_TOLERANCES_M = (100.0, 30.0, 10.0, 3.0, 1.0)
+
+#screen error allowed when picking a level for a zoom, in pixels
+TOLERANCE_PX = 1.5
+
+
+#Douglas-Peucker on projected coordinates, returns a boolean mask of the points kept
+#distances are measured to the segment (not the infinite line) so swings and loops are kept
+def douglas_peucker(x, y, tolerance):
+    n = len(x)
+    keep = np.zeros(n, dtype=bool)
+    if n <= 2:
+        keep[:] = True
+        return keep
+    keep[0] = keep[-1] = True
+
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        dx, dy = x[end] - x[start], y[end] - y[start]
+        px, py = x[start + 1:end] - x[start], y[start + 1:end] - y[start]
+        length2 = dx * dx + dy * dy
+        t = np.clip((px * dx + py * dy) / length2, 0, 1) if length2 > 0 else 0.0
+        distances = np.hypot(px - t * dx, py - t * dy)
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+#bitmask of the levels of detail each track point belongs to
+def lod_mask(lat, long):
+    lat = np.asarray(lat, dtype=float)
+    long = np.asarray(long, dtype=float)
+    mask = np.zeros(len(lat), dtype=np.uint8)
+    if len(lat) == 0:
+        return mask
+    x, y = to_local_m(lat, long, lat[0], long[0])
+    for level, tolerance in enumerate(LOD_TOLERANCES_M):
+        mask |= douglas_peucker(x, y, tolerance).astype(np.uint8) << level
+    return mask
+
+#coarsest level whose tolerance stays under TOLERANCE_PX at a web map zoom
+def lod_level(zoom, latitude):
+    metres_per_pixel = 156543.03392 * np.cos(np.radians(latitude)) / 2 ** zoom
+    for level, tolerance in enumerate(LOD_TOLERANCES_M):
+        if tolerance <= metres_per_pixel * TOLERANCE_PX:
+            return level
+    return len(LOD_TOLERANCES_M) - 1
+
+#rows of a run frame (with a lod_mask column) kept at a level
+def select_lod(df, level):
+    return df[((df['lod_mask'].values >> level) & 1).astype(bool)]
@@ -0,0 +1,88 @@
+import os
+import numpy as np
+import pandas as pd
+from logwise.geo import to_local_m, closest_per_group
+from logwise.store import STORE_DIR, read_run
+
+#spatial index over every track point of an area, for "which runs passed within N m of here" queries
+#points are bucketed in a square grid of local metres around the area centre and stored sorted by cell,
+#so a query only measures the points of the cells its circle overlaps
+GRID_CELL_M = 50
+INDEX_FILE = 'spatial_index.npz'
+
+
+#path of the index of an area
+def index_path(area_name, out_dir='.'):
+    return os.path.join(out_dir, STORE_DIR, area_name, INDEX_FILE)
+
+#grid cell of local coordinates
+def grid_cells(x, y, cell_m=GRID_CELL_M):
+    return np.floor(np.asarray(x) / cell_m).astype(np.int64), np.floor(np.asarray(y) / cell_m).astype(np.int64)
+
+#builds and saves the index of every run of an area from the run store
+def build_index(area_name, exercises, out_dir='.', cell_m=GRID_CELL_M):
+    exercises = list(exercises)
+    tracks = [read_run(area_name, exercise, ['latitude', 'longitude'], out_dir) for exercise in exercises]
+    lat = np.concatenate([t['latitude'].values for t in tracks]) if tracks else np.zeros(0)
+    long = np.concatenate([t['longitude'].values for t in tracks]) if tracks else np.zeros(0)
+    run = np.concatenate([np.full(len(t), i, dtype=np.int32) for i, t in enumerate(tracks)]) if tracks else np.zeros(0, dtype=np.int32)
+    row = np.concatenate([np.arange(len(t), dtype=np.int32) for t in tracks]) if tracks else np.zeros(0, dtype=np.int32)
+
+    #projection centred on the area so local metres stay accurate
+    ref = ((lat.min() + lat.max()) / 2, (long.min() + long.max()) / 2) if len(lat) else (0.0, 0.0)
+    cx, cy = grid_cells(*to_local_m(lat, long, *ref), cell_m)
+    origin = (int(cx.min()), int(cy.min())) if len(cx) else (0, 0)
+    rows_count = int(cy.max() - origin[1] + 1) if len(cy) else 1
+    cell = (cx - origin[0]) * rows_count + (cy - origin[1])
+
+    order = np.argsort(cell, kind='stable')
+    path = index_path(area_name, out_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez(path, lat=lat[order], long=long[order], run=run[order], row=row[order], cell=cell[order],
+             exercises=np.array(exercises, dtype=str), ref=np.array(ref), grid=np.array([origin[0], origin[1], rows_count, cell_m]))
+    return path
+
+
+class SpatialIndex:
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.lat = data['lat']
+            self.long = data['long']
+            self.run = data['run']
+            self.row = data['row']
+            self.cell = data['cell']
+            self.exercises = data['exercises']
+            self.ref = tuple(data['ref'])
+            self.origin_x, self.origin_y, self.rows_count, self.cell_m = (int(v) for v in data['grid'])
+
+    #positions in the sorted arrays of the points in the cells a circle overlaps
+    def candidates(self, lat, long, radius_m):
+        x, y = to_local_m(lat, long, *self.ref)
+        cx0, cy0 = grid_cells(x - radius_m, y - radius_m, self.cell_m)
+        cx1, cy1 = grid_cells(x + radius_m, y + radius_m, self.cell_m)
+        cy0 = max(int(cy0) - self.origin_y, 0)
+        cy1 = min(int(cy1) - self.origin_y, self.rows_count - 1)
+        if cy0 > cy1:
+            return np.zeros(0, dtype=np.int64)
+        #one column of cells is a contiguous key range
+        columns = np.arange(int(cx0), int(cx1) + 1) - self.origin_x
+        starts = np.searchsorted(self.cell, columns * self.rows_count + cy0, 'left')
+        ends = np.searchsorted(self.cell, columns * self.rows_count + cy1, 'right')
+        return np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)]) if len(columns) else np.zeros(0, dtype=np.int64)
+
+    #closest approach of every run passing within radius_m of a point: exercise, row of the run and distance
+    def near(self, lat, long, radius_m):
+        candidates = self.candidates(lat, long, radius_m)
+        runs, positions, distances = closest_per_group(self.lat[candidates], self.long[candidates], self.run[candidates], lat, long)
+        inside = distances <= radius_m
+        df = pd.DataFrame({
+            'exercise': self.exercises[runs[inside]],
+            'row': self.row[candidates[positions[inside]]],
+            'distance': distances[inside],
+        })
+        return df.sort_values('distance', ignore_index=True)
+
+#loaded index of an area, or None when it was never built
+def load_index(area_name, out_dir='.'):
+    path = index_path(area_name, out_dir)
+    return SpatialIndex(path) if os.path.exists(path) else None
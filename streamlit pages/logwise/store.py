@@ -0,0 +1,59 @@
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+#columnar run store: one uncompressed Arrow IPC file per area/exercise, so reads can be memory-mapped
+#and only the requested columns are touched
+STORE_DIR = 'run_store'
+
+#positions stay in float64 to keep sub-metre precision, every other numeric channel is float32
+FLOAT64_COLUMNS = ['latitude', 'longitude']
+
+
+#path of a run partition
+def run_path(area_name, exercise, out_dir='.'):
+    return os.path.join(out_dir, STORE_DIR, area_name, f'{exercise}.arrow')
+
+#writes a merged run frame as a typed partition
+def write_run(df, area_name, exercise, out_dir='.'):
+    df = df.copy()
+    for column in df.columns:
+        if df[column].dtype == np.float64 and column not in FLOAT64_COLUMNS:
+            df[column] = df[column].astype(np.float32)
+        elif pd.api.types.is_string_dtype(df[column]) and column != 'time':
+            df[column] = df[column].astype('category')
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    path = run_path(area_name, exercise, out_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    feather.write_feather(table, path, compression='uncompressed')
+    return path
+
+#modification time of a run partition, part of the keys of the caches built from it
+#so a run ingested again under the same area/exercise is not served from an older copy
+def run_modified(area_name, exercise, out_dir='.'):
+    return os.stat(run_path(area_name, exercise, out_dir)).st_mtime_ns
+
+#reads a run partition, optionally projecting only some columns (e.g. ['latitude', 'longitude'] for maps)
+def read_run(area_name, exercise, columns=None, out_dir='.'):
+    table = feather.read_table(run_path(area_name, exercise, out_dir), columns=columns, memory_map=True)
+    return table.to_pandas()
+
+#lists the columns stored for a run without reading any data
+def run_columns(area_name, exercise, out_dir='.'):
+    with pa.memory_map(run_path(area_name, exercise, out_dir)) as source:
+        return pa.ipc.open_file(source).schema.names
+
+#one row as a dict, float32 values keep their short decimal form (9.9 rather than 9.899999618530273)
+def row_to_dict(df, position):
+    row = {}
+    for column in df.columns:
+        value = df[column].iat[position]
+        if isinstance(value, np.float32):
+            value = float(str(value))
+        elif isinstance(value, np.generic):
+            value = value.item()
+        row[column] = value
+    return row
@@ -0,0 +1,95 @@
+import os
+import numpy as np
+import shapely
+from logwise.geo import to_local_m, from_local_m
+from logwise.store import STORE_DIR
+
+#swept path of a run: the area covered by the ship's hull, not just by its reference point
+#the hull outline is placed at every tick from position and heading in one array pass, consecutive outlines
+#are joined by their convex hull (so the motion between ticks is covered) and everything is unioned with shapely
+
+#(length, beam) in meters by ship name, matched on a lowercase part of the OS name of the reports
+#the position of the reports is taken as the midship point on the centreline
+SHIP_DIMENSIONS = {
+    'royal princess': (330.0, 38.4),
+    'iona': (345.0, 42.0),
+}
+#ships not in the table (e.g. "OS 1")
+DEFAULT_DIMENSIONS = (300.0, 40.0)
+
+#a tick is skipped until some hull corner has moved this far since the last one kept
+SWEPT_STEP_M = 10.0
+#tolerance of the simplified outline that is stored
+SWEPT_SIMPLIFY_M = 0.5
+SWEPT_SUFFIX = '.swept.wkb'
+
+
+#path of the swept path of a run, next to its store partition
+def swept_path_file(area_name, exercise, out_dir='.'):
+    return os.path.join(out_dir, STORE_DIR, area_name, f'{exercise}{SWEPT_SUFFIX}')
+
+#dimensions of a ship from its name
+def ship_dimensions(ship):
+    name = str(ship).lower()
+    for key, dimensions in SHIP_DIMENSIONS.items():
+        if key in name:
+            return dimensions
+    return DEFAULT_DIMENSIONS
+
+#hull outline around the reference point, x to starboard and y forward: parallel midbody and a tapered bow
+def hull_outline(length, beam):
+    half_length, half_beam = length / 2, beam / 2
+    return np.array([
+        (-half_beam, -half_length), (half_beam, -half_length), (half_beam, 0.25 * length), (0.6 * half_beam, 0.42 * length),
+        (0, half_length), (-0.6 * half_beam, 0.42 * length), (-half_beam, 0.25 * length),
+    ])
+
+#hull corners at every tick in local east/north meters, shape (ticks, corners, 2)
+def hull_corners(x, y, heading, outline):
+    heading = np.radians(np.asarray(heading, dtype=float))[:, None]
+    sin, cos = np.sin(heading), np.cos(heading)
+    east = np.asarray(x)[:, None] + outline[:, 0] * cos + outline[:, 1] * sin
+    north = np.asarray(y)[:, None] - outline[:, 0] * sin + outline[:, 1] * cos
+    return np.stack([east, north], axis=-1)
+
+#ticks kept for the union: the first, the last and one each time the hull has moved step_m
+def moved_ticks(corners, step_m=SWEPT_STEP_M):
+    moved = np.hypot(*np.moveaxis(np.diff(corners, axis=0), -1, 0)).max(axis=1)
+    travelled = np.r_[0, np.cumsum(moved)]
+    keep = np.r_[True, np.diff(np.floor(travelled / step_m)) > 0]
+    keep[-1] = True
+    return keep
+
+#swept path polygon of a track in latitude/longitude, with its area in square meters
+def swept_path(lat, long, heading, ship='', step_m=SWEPT_STEP_M):
+    lat = np.asarray(lat, dtype=float)
+    long = np.asarray(long, dtype=float)
+    ref_lat, ref_long = (lat.min() + lat.max()) / 2, (long.min() + long.max()) / 2
+
+    corners = hull_corners(*to_local_m(lat, long, ref_lat, ref_long), heading, hull_outline(*ship_dimensions(ship)))
+    corners = corners[moved_ticks(corners, step_m)]
+    if len(corners) > 1:
+        hulls = shapely.convex_hull(shapely.multipoints(np.concatenate([corners[:-1], corners[1:]], axis=1)))
+    else:
+        hulls = shapely.polygons(corners)
+    swept = shapely.union_all(hulls).simplify(SWEPT_SIMPLIFY_M)
+
+    area = swept.area
+    swept = shapely.transform(swept, lambda xy: np.column_stack(from_local_m(xy[:, 0], xy[:, 1], ref_lat, ref_long)[::-1]))
+    return swept, area
+
+#saves the swept path of a run
+def write_swept(swept, area_name, exercise, out_dir='.'):
+    path = swept_path_file(area_name, exercise, out_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as file:
+        file.write(shapely.to_wkb(swept))
+    return path
+
+#swept path of a run, None for data ingested before swept paths existed
+def read_swept(area_name, exercise, out_dir='.'):
+    try:
+        with open(swept_path_file(area_name, exercise, out_dir), 'rb') as file:
+            return shapely.from_wkb(file.read())
+    except FileNotFoundError:
+        return None
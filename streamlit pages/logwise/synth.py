@@ -0,0 +1,158 @@
+import os
+import numpy as np
+from logwise.geo import from_local_m
+
+#synthetic Log-/ShipDynamics- report pairs in the exact Report Generator layout, for benchmarks:
+#BOM, 8 metadata lines, a blank line, column names, units row, then CRLF data rows with every number
+#quoted and comma-grouped ("4,230.48"); each run is an arrival or departure with a swing near the berth
+
+#berth and default area of the generated runs (the Dover sample logs)
+DEFAULT_PORT = (51.116124, 1.319884)
+DEFAULT_AREA = 'Dover'
+MODEL_VERSION = '2.222.1804.0 / 0.0.0.0 / 2.94.4021.0 / 3.0.97.0'
+SHIPS = ['Cruise Ship Royal Princess', 'Cruise ship Iona']
+
+KNOTS_TO_MS = 1852 / 3600
+
+#(column, unit, decimals) in the order of the sample reports, decimals None for text columns
+LOG_COLUMNS = [
+    ('time', '', None), ('Local position X', 'meters', 2), ('Local position Y', 'meters', 2), ('Heading', 'degrees', 2),
+    ('Autopilot state', '', None), ('Autopilot course', 'degrees', 2), ('Rate of turn', 'degrees_per_minute', 1),
+    ('Port telegraph order', '', 6), ('Starboard telegraph order', '', 6), ('Port engine RPM', '', 6), ('Starboard engine RPM', '', 6),
+    ('Port propeller pitch', '', 6), ('Starboard propeller pitch', '', 6), ('Port rudder order', 'degrees', 2), ('Starboard rudder order', 'degrees', 2),
+    ('Port rudder angle', 'degrees', 2), ('Starboard rudder angle', 'degrees', 2), ('Bow thruster power order', '', 6),
+    ('Bow thruster gained power', 'percent_tenths', 1), ('Stern thruster power order', '', 6), ('Stern thruster gained power', 'percent_tenths', 1),
+    ('Distance made Good', 'meters', 2), ('Water depth (echo-sounder)', 'meters', 2), ('Draft at ship bow', 'meters', 2), ('Draft at ship stern', 'meters', 2),
+    ('Under keel clearance fwd', 'meters', 2), ('Under keel clearance aft', 'meters', 2), ('Current speed', 'knots', 1), ('Current direction', 'degrees', 2),
+    ('True wind speed', 'knots', 1), ('True wind direction', 'degrees', 2), ('Relative wind speed', 'knots', 1), ('Relative wind direction', 'degrees', 2),
+    ('Significant wave height', 'meters', 2), ('Wave direction', 'degrees', 2), ('Longitudinal speed through the water', 'knots', 1),
+    ('Transverse speed through the water', 'knots', 1), ('Longitudinal speed', 'knots', 1), ('Transverse speed', 'knots', 1),
+    ("Transverse speed at ship's bow", 'knots', 1), ("Transverse speed at ship's stern", 'knots', 1), ('Drift angle', 'degrees', 2),
+    ('Surge', 'meters', 2), ('Surge speed', 'knots', 1), ('Sway', 'meters', 2), ('Sway speed', 'knots', 1), ('Heave', 'meters', 2), ('Heave speed', 'knots', 1),
+    ('Yaw angle', 'degrees', 2), ('Yaw rate', 'degrees_per_minute', 1), ('Roll angle', 'degrees', 2), ('Roll rate', 'degrees_per_minute', 1),
+    ('Pitch angle', 'degrees', 2), ('Pitch rate', 'degrees_per_minute', 1), ('Height above the water', 'meters', 2),
+]
+
+SHIP_COLUMNS = [
+    ('time', '', None), ('Latitude', '', 6), ('Longitude', '', 6), ('COG', 'degrees', 2), ('SOG', 'knots', 1), ('Heading', 'degrees', 2),
+    ('Log', 'knots', 1), ('Set', 'degrees', 2), ('Drift', 'knots', 1), ("Transverse speed at ship's bow", 'knots', 1),
+    ("Transverse speed at ship's stern", 'knots', 1), ('Port rudder angle', 'degrees', 2), ('Rate of turn', 'degrees_per_minute', 1),
+    ('Port engine RPM', '', 6), ('Starboard engine RPM', '', 6), ('Port propeller pitch', '', 6), ('Starboard propeller pitch', '', 6),
+    ('Bow thruster gained power', 'percent_tenths', 1), ('Stern thruster gained power', 'percent_tenths', 1),
+]
+
+
+#channel values of one run, keyed by report column
+def simulate_run(rng, duration=1800, step=1, port=DEFAULT_PORT, arrival=True):
+    n = int(duration // step) + 1
+    t = np.arange(n) * step
+    phase = t / t[-1]
+
+    #speed falls from the approach speed to dead slow, the last 20% is the swing at the berth
+    approach_speed = rng.uniform(8, 11)
+    sog = np.maximum(approach_speed * (1 - phase) ** 1.5, 0.2 + 0.3 * rng.random(n) * (phase > 0.8))
+    travelled = np.cumsum(sog * KNOTS_TO_MS * step)
+    travelled -= travelled[0]
+
+    #gently curved approach ending 50 m off the berth
+    bearing = np.radians(rng.uniform(0, 360))
+    along = travelled[-1] - travelled + 50
+    across = rng.uniform(-300, 300) * np.sin(np.pi * travelled / travelled[-1])
+    x = along * np.sin(bearing) + across * np.cos(bearing)
+    y = along * np.cos(bearing) - across * np.sin(bearing)
+    if not arrival:
+        x, y, sog, along = x[::-1], y[::-1], sog[::-1], along[::-1]
+    lat, long = from_local_m(x, y, *port)
+
+    cog = np.degrees(np.arctan2(np.gradient(x), np.gradient(y))) % 360
+    swing = np.clip((phase - 0.8) / 0.2, 0, 1) if arrival else np.clip((0.2 - phase) / 0.2, 0, 1)
+    swing_angle = rng.choice([-1, 1]) * rng.uniform(90, 180)
+    heading = (np.degrees(np.unwrap(np.radians(cog))) + swing_angle * swing) % 360
+    rate_of_turn = np.gradient(np.degrees(np.unwrap(np.radians(heading)))) / step * 60
+
+    thrusters = np.where(swing > 0, np.sign(swing_angle) * rng.uniform(30, 100, n), 0.0)
+    rudder = np.clip(rate_of_turn * 2, -35, 35) % 360
+    rpm = np.round(61 * sog / 10)
+    depth = 14 + 10 * (along / along.max())
+    current_speed, current_direction = rng.uniform(0, 3), rng.uniform(0, 360)
+    wind_speed, wind_direction = rng.choice([0, rng.uniform(5, 35)]), rng.uniform(0, 360)
+    wave_height = rng.choice([0.0, 0.5, 1.0, 1.5])
+    drift_angle = rng.normal(0, 2, n) % 360
+    relative_wind = (wind_direction - heading) % 360
+    transverse = sog * np.sin(np.radians(drift_angle))
+
+    values = {
+        'Local position X': x + 4000, 'Local position Y': y + 3000, 'Latitude': lat, 'Longitude': long,
+        'COG': cog, 'SOG': sog, 'Heading': heading, 'Autopilot course': heading, 'Rate of turn': rate_of_turn, 'Yaw rate': rate_of_turn,
+        'Log': sog * np.cos(np.radians(drift_angle)), 'Set': np.full(n, current_direction), 'Drift': np.full(n, current_speed),
+        'Port telegraph order': rpm, 'Starboard telegraph order': rpm, 'Port engine RPM': rpm, 'Starboard engine RPM': rpm,
+        'Port rudder order': rudder, 'Starboard rudder order': rudder, 'Port rudder angle': rudder, 'Starboard rudder angle': rudder,
+        'Bow thruster power order': np.round(thrusters), 'Bow thruster gained power': np.round(thrusters),
+        'Stern thruster power order': np.round(-thrusters), 'Stern thruster gained power': np.round(-thrusters),
+        'Distance made Good': np.abs(travelled - (0 if arrival else travelled[-1])), 'Water depth (echo-sounder)': depth,
+        'Draft at ship bow': np.full(n, 8.49), 'Draft at ship stern': np.full(n, 8.54),
+        'Under keel clearance fwd': depth - 8.49, 'Under keel clearance aft': depth - 8.54 + rng.normal(0, 0.05, n),
+        'Current speed': np.full(n, current_speed), 'Current direction': np.full(n, current_direction),
+        'True wind speed': np.full(n, wind_speed), 'True wind direction': np.full(n, wind_direction),
+        'Relative wind speed': np.abs(wind_speed + sog * np.cos(np.radians(relative_wind))), 'Relative wind direction': relative_wind,
+        'Significant wave height': np.full(n, wave_height), 'Wave direction': np.full(n, wind_direction if wave_height else 0.0),
+        'Longitudinal speed through the water': sog - current_speed * np.cos(np.radians(current_direction - heading)),
+        'Transverse speed through the water': transverse - current_speed * np.sin(np.radians(current_direction - heading)),
+        'Longitudinal speed': sog * np.cos(np.radians(drift_angle)), 'Transverse speed': transverse,
+        "Transverse speed at ship's bow": transverse + rate_of_turn * 0.05, "Transverse speed at ship's stern": transverse - rate_of_turn * 0.05,
+        'Drift angle': drift_angle, 'Yaw angle': heading, 'Height above the water': 2.7 + rng.normal(0, 0.05, n),
+    }
+    #small ship motions, angles wrapped to 0-360 as in the reports
+    for column in ('Surge', 'Sway', 'Heave', 'Surge speed', 'Sway speed', 'Heave speed', 'Roll rate', 'Pitch rate'):
+        values[column] = rng.normal(0, 0.1, n)
+    for column in ('Roll angle', 'Pitch angle'):
+        values[column] = rng.normal(0, 0.1, n) % 360
+    for column in ('Port propeller pitch', 'Starboard propeller pitch'):
+        values[column] = np.zeros(n)
+    values['time'] = [f'{s // 3600:02d}:{s % 3600 // 60:02d}:{s % 60:02d}' for s in t.astype(int)]
+    values['Autopilot state'] = ['Off'] * n
+    return values
+
+#report text for the given columns of a simulated run
+def report_text(values, columns, metadata):
+    lines = [f'{key}: {value}' for key, value in metadata.items()] + ['']
+    lines.append(','.join(name for name, _, _ in columns))
+    lines.append(','.join(unit for _, unit, _ in columns))
+
+    #every column formatted at once, then stitched into rows
+    cells = []
+    for name, _, decimals in columns:
+        if decimals is None:
+            cells.append(values[name])
+        else:
+            cells.append([f'"{v:,.{decimals}f}"' for v in np.asarray(values[name], dtype=float)])
+    lines.extend(','.join(row) for row in zip(*cells))
+    return '\r\n'.join(lines) + '\r\n'
+
+#writes one Log-/ShipDynamics- pair named like the Report Generator exports and returns both paths
+def write_pair(target_dir, exercise, rng, duration=1800, step=1, area=DEFAULT_AREA, port=DEFAULT_PORT, ship=None, arrival=None):
+    ship = ship or SHIPS[int(rng.integers(len(SHIPS)))]
+    arrival = bool(rng.integers(2)) if arrival is None else arrival
+    values = simulate_run(rng, duration, step, port, arrival)
+    metadata = {
+        'OS': ship, 'Trainee': '', 'Exercise name': f'{exercise}.nti', 'Area': area, 'Exercise start time': '12:00:00',
+        'Exercise date': '11/28/2023', 'Step (sec)': f'{step:g}', 'Model version': MODEL_VERSION,
+    }
+    short_name = ship.split(' ', 2)[-1]
+    paths = []
+    for kind, columns in (('Log', LOG_COLUMNS), ('ShipDynamics', SHIP_COLUMNS)):
+        path = os.path.join(target_dir, f'{exercise} - 2024-01-10 12-00-00 - {kind}-{short_name}.csv')
+        with open(path, 'w', encoding='utf-8-sig', newline='') as file:
+            file.write(report_text(values, columns, metadata))
+        paths.append(path)
+    return paths
+
+#writes `runs` synthetic pairs, durations varying by +-20% around `duration`, and returns the file list
+def generate_corpus(target_dir, runs, duration=1800, step=1, seed=0, area=DEFAULT_AREA, port=DEFAULT_PORT):
+    rng = np.random.default_rng(seed)
+    os.makedirs(target_dir, exist_ok=True)
+    files = []
+    for i in range(runs):
+        run_duration = int(duration * rng.uniform(0.8, 1.2))
+        files.extend(write_pair(target_dir, f'SYN_{i:04d}', rng, run_duration, step, area, port))
+    return sorted(files)
@@ -0,0 +1,18 @@
+import numpy as np
+
+#time-second index of a run: array position = elapsed second, value = row of the tick at or before that second
+#so map clicks and slider moves find their row in O(1) instead of scanning the time strings
+
+
+#builds the index from the run's sorted 'seconds' column
+def time_index(seconds):
+    seconds = np.asarray(seconds, dtype=np.int64)
+    index = np.full(int(seconds[-1]) + 1, -1, dtype=np.int32)
+    index[seconds] = np.arange(len(seconds), dtype=np.int32)
+    #seconds without a tick (steps over 1 s, dropped ticks) point to the previous tick
+    return np.maximum.accumulate(index)
+
+#row of the tick at or before a second, clamped to the run
+def position_at(index, second):
+    second = min(max(int(second), 0), len(index) - 1)
+    return max(int(index[second]), 0)
@@ -1,97 +1,111 @@
+import os
 import streamlit as st
 import pandas as pd
 import folium
 from streamlit_folium import st_folium
-import geopandas as gpd
-from shapely.geometry import LineString
+from logwise.maps import routes_base_map, routes_layer, MAP_ZOOM
+from logwise.query import RunIndex
+from logwise.runcache import run_cache
+from logwise.spatial import load_index, index_path
+from logwise.store import row_to_dict
+from logwise.profiling import span
+from logwise.jobs import follow_job, poll_job, job_running, keep_selection, keep_range
 
-#filter the database
-def filter(df, all_filters):
-    
-    selected_values = {}
+#values reported at the closest approach of each run
+APPROACH_CHANNELS = ['time', 'sog', 'cog', 'heading', 'rate_of_turn', 'under_keel_clearance_fwd', 'under_keel_clearance_aft']
 
-    #display filters
-    for filter in all_filters:
-        selected_values[filter] = st.sidebar.selectbox(f"{filter.replace('_',' ').title()}:", options=['Select all'] + st.session_state.df_initial[filter].unique().tolist())
-    
-    
-    filter_conditions = []
+#filter the database through the bitmap index of the summary
+def filter(df, category_filters, range_filters):
 
-    #create list with conditions
-    for filter in all_filters:
-        if 'Select all' not in str(selected_values[filter]):
-            filter_conditions.append(df[filter].isin([selected_values[filter]]))
+    #index built once per loaded summary
+    if st.session_state.get('run_index_source') is not st.session_state.df_initial:
+        st.session_state.run_index = RunIndex(st.session_state.df_initial, category_filters, range_filters)
+        st.session_state.run_index_source = st.session_state.df_initial
+    index = st.session_state.run_index
 
-    #apply conditions
-    if filter_conditions:
-        df_filtered = st.session_state.df_initial[pd.concat(filter_conditions, axis=1).all(axis=1)]
-    else:
-        df_filtered = df
+    #display filters, an empty selection keeps every value
+    #(keyed, so the values picked survive the runs loaded in the background changing the options and bounds)
+    selections = {}
+    for filter in category_filters:
+        keep_selection(f'routes_{filter}', index.options(filter))
+        selections[filter] = st.sidebar.multiselect(f"{filter.replace('_',' ').title()}:", options=index.options(filter), placeholder='Select all', key=f'routes_{filter}')
 
-    return df_filtered
-    
-def display_map(df):
-
-    min_lat, max_lat, min_long, max_long = float('inf'), float('-inf'), float('inf'), float('-inf')
-        
-    for index, row in df.iterrows():
-        # read files from run summary
-        df_ex = pd.read_csv(f'{row.area_name}/{row.file_name}')
-                
-        # Update min and max values
-        min_lat = min(min_lat, df_ex['latitude'].min())
-        max_lat = max(max_lat, df_ex['latitude'].max())
-        min_long = min(min_long, df_ex['longitude'].min())
-        max_long = max(max_long, df_ex['longitude'].max())
-    
-    map = folium.Map(location=[(min_lat + max_lat) / 2, (min_long + max_long) / 2], zoom_start=4, scrollWheelZoom=True, tiles='CartoDB positron')
-    
-    for index, row in df.iterrows():
-        # read files from run summary
-        df_ex = pd.read_csv(f'{row.area_name}/{row.file_name}')
-    
-        # create geojson
-        line = LineString(list(zip(df_ex['longitude'], df_ex['latitude'])))
-        gdf = gpd.GeoDataFrame(geometry=[line], crs="EPSG:4326")
-                
-        coordinates = gdf.to_crs("EPSG:4326")["geometry"].iloc[0].coords.xy
-        geojson_coordinates = list(zip(coordinates[0], coordinates[1]))
-            
-        properties = {col:row[col] for col in df.columns}
-        line_color = "[255, 0, 0, 128]" if (lambda x: x['type'] == 'Arrival')(row) else "[0, 0, 255, 128]"
-    
-            
-        geojson_data = {
-            'type': 'FeatureCollection',
-            'features': [{
-                    'type': 'Feature',
-                    'id': properties['exercise'],
-                    'geometry': {
-                    'type': 'LineString',
-                    'coordinates': geojson_coordinates,
-                    },
-                    'properties': properties
-                }]
-            }
-    
-                   
-        choropleth = folium.Choropleth(
-            geo_data=geojson_data,
-            data=df,
-            columns=('exercise', 'type', 'ship', 'wose_rose_direction', 'wind_speed', 'wrose_current_direction', 'current_velocity'),
-            #key_on= 'feature.id',
-            line_opacity=0.8,
-            highlight=True,
-            line_color = 'red' if geojson_data['features'][0]['properties']['type'] == 'Arrival' else 'blue',
-            smooth_factor = 1
-        )
-        choropleth.geojson.add_to(map)    
-      
-        choropleth.geojson.add_child(
-            folium.features.GeoJsonTooltip(['exercise'], labels=False)
-        )
-            
-    st_map = st_folium(map, width=700, height=450, zoom=13, use_container_width=True)
+    #a range only filters once it is narrowed, so runs without a value stay in by default
+    ranges = {}
+    for filter in range_filters:
+        if filter not in st.session_state.df_initial:
+            continue
+        low, high = index.value_range(filter)
+        if low < high:
+            keep_range(f'routes_{filter}', float(low), float(high))
+            selected_range = st.sidebar.slider(f"{filter.replace('_',' ').title()}:", min_value=float(low), max_value=float(high), key=f'routes_{filter}')
+            if selected_range != (float(low), float(high)):
+                ranges[filter] = selected_range
+
+    return index.query(selections, ranges)
+
+#spatial index of an area, loaded again only when ingest rebuilt it
+@st.cache_resource(max_entries=8)
+def area_index(area_name, out_dir, modified):
+    return load_index(area_name, out_dir)
+
+#point used by the proximity filter, taken from the last click in the value returned by st_folium
+#the map is already drawn by then, so the page is run again to filter around the new point
+def sync_map_click(st_map):
+    if not st_map.get('last_clicked') or st_map['last_clicked'] == st.session_state.last_map_click:
+        return
+    st.session_state.last_map_click = st_map['last_clicked']
+    st.session_state.proximity_point = (st_map['last_clicked']['lat'], st_map['last_clicked']['lng'])
+    st.rerun()
+
+#runs passing within radius meters of a point, with their closest approach and the channel values there
+def proximity_filter(df, point, radius):
+    out_dir = st.session_state.get('out_dir', '.')
+    approaches = []
+    for area_name in df['area_name'].unique():
+        path = index_path(area_name, out_dir)
+        if os.path.exists(path):
+            df_near = area_index(area_name, out_dir, os.path.getmtime(path)).near(point[0], point[1], radius)
+            approaches.append(df_near.assign(area_name=area_name))
+    if not approaches:
+        return df.iloc[0:0], pd.DataFrame()
+    df_near = pd.concat(approaches, ignore_index=True).merge(df[['area_name', 'exercise', 'type', 'ship']], on=['area_name', 'exercise'])
+
+    cache = run_cache()
+    values = []
+    for area_name, exercise, row in zip(df_near['area_name'], df_near['exercise'], df_near['row']):
+        values.append(row_to_dict(cache.get(area_name, exercise, out_dir).columns(APPROACH_CHANNELS), row))
+    df_near = pd.concat([df_near.drop(columns='row'), pd.DataFrame(values)], axis=1)
+
+    return df[df['exercise'].isin(df_near['exercise'])], df_near
+
+def display_map(df, point=None, radius=None, swept=False, proximity=False):
+
+    #every filtered run in one layer, bounds from the summary
+    profiler = st.session_state.get('profiler')
+    #the routes go in a layer added on the client, so a new level of detail does not remount the map
+    zoom = st.session_state.routes_zoom
+    with span(profiler, 'routes_map', page='Filter Routes', runs=len(df), swept=swept):
+        map = routes_base_map(df)
+        layer = routes_layer(df, zoom, st.session_state.get('out_dir', '.'), cache=run_cache(), swept=swept)
+
+    #proximity circle
+    if point:
+        folium.Circle(location=point, radius=radius, color='orange', fill=True, fill_opacity=0.1, weight=2).add_to(layer)
+
+    with span(profiler, 'st_folium', page='Filter Routes', runs=len(df)):
+        st_map = st_folium(map, width=700, height=450, zoom=zoom, center=st.session_state.routes_center, use_container_width=True, feature_group_to_add=layer, key='routes_map')
+
+    #keep the view the user left the map at, and after a zoom run the page again so the layer gets the detail of the new zoom
+    #(only the map reports a center, the values returned before it has drawn just echo the defaults)
+    if st_map.get('center'):
+        st.session_state.routes_zoom = st_map['zoom']
+        st.session_state.routes_center = (st_map['center']['lat'], st_map['center']['lng'])
+        if st_map['zoom'] != zoom:
+            st.rerun()
+
+    if proximity:
+        sync_map_click(st_map)
     
     sel_run = ''
     if st_map['last_active_drawing']:
@@ -104,14 +118,63 @@ def main():
     st.set_page_config(layout="wide", page_title = 'Filter Routes')
     st.markdown(" <style> div[class^='block-container'] { padding-top: 2rem; } </style> ", unsafe_allow_html=True)
 
+    #runs loaded in the background so far
+    follow_job()
+
+    if 'routes_zoom' not in st.session_state:
+        st.session_state.routes_zoom = MAP_ZOOM
+    if 'routes_center' not in st.session_state:
+        st.session_state.routes_center = None
+    if 'last_map_click' not in st.session_state:
+        st.session_state.last_map_click = None
+    if 'proximity_point' not in st.session_state:
+        st.session_state.proximity_point = None
+
     if 'df_runs' in st.session_state:
         #Display Filters and Map
-        filtered_df = filter(st.session_state.df_runs, ['type', 'ship', 'wrose_wind_direction', 'wind_speed', 'wrose_current_direction', 'current_velocity'])
-        if filtered_df.shape[0]!=0:
-            display_map(filtered_df)
-        else:
+        filtered_df = filter(st.session_state.df_runs, ['type', 'ship', 'wrose_wind_direction', 'wrose_current_direction'], ['wind_speed', 'current_velocity', 'min_ukc_fwd', 'min_ukc_aft', 'peak_rate_of_turn'])
+
+        #runs passing near a point clicked on the map, through the spatial indexes built once every run is loaded
+        loading = job_running()
+        proximity = st.sidebar.toggle('Proximity filter (click on the map)', disabled=loading) and not loading
+        if loading:
+            st.sidebar.caption('The proximity filter is available once the runs are loaded.')
+        radius = st.sidebar.number_input('Radius (m):', min_value=10, max_value=5000, value=200, step=10, disabled=not proximity)
+        #area covered by the hulls, not only by the reference points
+        swept = st.sidebar.toggle('Show swept paths')
+        point = None
+        candidate_df = filtered_df
+        if proximity:
+            point = st.session_state.proximity_point
+            if point:
+                with span(st.session_state.get('profiler'), 'proximity_query', page='Filter Routes', runs=len(filtered_df)):
+                    filtered_df, df_approaches = proximity_filter(filtered_df, point, radius)
+
+        #with no run near the point the map keeps the other filters' runs, so another point can be picked
+        if candidate_df.shape[0]!=0:
+            display_map(filtered_df if filtered_df.shape[0]!=0 else candidate_df, point, radius, swept, proximity)
+        if filtered_df.shape[0]==0:
             st.write('No runs found.')
 
+        if point and filtered_df.shape[0]!=0:
+            st.write(f"**Closest approach** to {point[0]:.6f}, {point[1]:.6f} (within {radius} m)")
+            st.dataframe(df_approaches, column_config={
+                "exercise": "Run",
+                "ship": "Ship",
+                "type": "Type",
+                "distance": st.column_config.NumberColumn("Distance (m)", format="%.1f"),
+                "time": "Time",
+                "sog": "SOG",
+                "cog": "COG",
+                "heading": "Heading",
+                "rate_of_turn": "ROT",
+                "under_keel_clearance_fwd": "UKC Fwd",
+                "under_keel_clearance_aft": "UKC Aft"
+            },
+            column_order = ("exercise", "ship", "type", "distance", "time", "sog", "cog", "heading", "rate_of_turn", "under_keel_clearance_fwd", "under_keel_clearance_aft"),
+            use_container_width=True,
+            hide_index=True)
+
         def highlight_good_practice(row):
             return ['background-color: #E3ECEE' if row['good_practice']==True else '' for col in row]
 
@@ -129,9 +192,17 @@ def main():
                 "wind_wave_height": "Wave Height",
                 "wind_wave_direction": "Wave Direction",
                 "current_velocity": "Current Speed",
-                "wrose_current_direction": "Current Direction"
+                "wrose_current_direction": "Current Direction",
+                "min_ukc_fwd": "Min UKC Fwd",
+                "min_ukc_aft": "Min UKC Aft",
+                "max_sog_500m": "Max SOG 500 m",
+                "peak_rate_of_turn": "Peak ROT",
+                "time_in_swing": "Swing Time (s)",
+                "bow_thruster_energy": "Bow Thruster Energy",
+                "stern_thruster_energy": "Stern Thruster Energy",
+                "swept_area": st.column_config.NumberColumn("Swept Area (m²)", format="%d")
             },
-            column_order = ("exercise", "ship", "type", "trainee", "wrose_wind_direction", "wind_speed", "wind_gust", "wrose_current_direction", "current_velocity", "wind_wave_direction", "wind_wave_height"),
+            column_order = ("exercise", "ship", "type", "trainee", "wrose_wind_direction", "wind_speed", "wind_gust", "wrose_current_direction", "current_velocity", "wind_wave_direction", "wind_wave_height", "min_ukc_fwd", "min_ukc_aft", "max_sog_500m", "peak_rate_of_turn", "time_in_swing", "bow_thruster_energy", "stern_thruster_energy", "swept_area"),
             use_container_width=True,
             hide_index=True)
         else:
@@ -146,9 +217,17 @@ def main():
                 "wind_wave_height": "Wave Height",
                 "wind_wave_direction": "Wave Direction",
                 "current_velocity": "Current Speed",
-                "wrose_current_direction": "Current Direction"
+                "wrose_current_direction": "Current Direction",
+                "min_ukc_fwd": "Min UKC Fwd",
+                "min_ukc_aft": "Min UKC Aft",
+                "max_sog_500m": "Max SOG 500 m",
+                "peak_rate_of_turn": "Peak ROT",
+                "time_in_swing": "Swing Time (s)",
+                "bow_thruster_energy": "Bow Thruster Energy",
+                "stern_thruster_energy": "Stern Thruster Energy",
+                "swept_area": st.column_config.NumberColumn("Swept Area (m²)", format="%d")
             },
-            column_order = ("exercise", "ship", "type", "trainee", "wrose_wind_direction", "wind_speed", "wind_gust", "wrose_current_direction", "current_velocity", "wind_wave_direction", "wind_wave_height"),
+            column_order = ("exercise", "ship", "type", "trainee", "wrose_wind_direction", "wind_speed", "wind_gust", "wrose_current_direction", "current_velocity", "wind_wave_direction", "wind_wave_height", "min_ukc_fwd", "min_ukc_aft", "max_sog_500m", "peak_rate_of_turn", "time_in_swing", "bow_thruster_energy", "stern_thruster_energy", "swept_area"),
             use_container_width=True,
             hide_index=True)
         #st.session_state.df_runs = filtered_df
@@ -158,4 +237,6 @@ def main():
 
 if __name__ == "__main__":
 
-    main()
\ No newline at end of file
+    main()
+    #runs still loading in the background
+    poll_job()
@@ -1,57 +1,74 @@
 import streamlit as st
-import pandas as pd
+import streamlit.components.v1 as components
 import folium
 from streamlit_folium import st_folium
-import geopandas as gpd
-from shapely.geometry import LineString, Point
-import altair as alt
-from vega_datasets import data
+from shapely.geometry import Point
+from logwise.store import row_to_dict, run_modified
+from logwise.runcache import run_cache
+from logwise.simplify import lod_level, select_lod
+from logwise.maps import MAP_ZOOM
+from logwise.charts import base_chart, time_rule, numeric_channels, DEFAULT_CHANNELS
+from logwise.timeindex import position_at
+from logwise.merge import seconds_to_time
+from logwise.profiling import span
+from logwise.jobs import follow_job, poll_job, keep_selection
+from logwise.swept import read_swept
+from logwise.replay import run_timeline, replay_html, REPLAY_COLUMNS, REPLAY_COLORS
 
 def reset_selected_point():
-    st.session_state.selected_point = '00:00:01'
+    st.session_state.timeframe = None
+    st.session_state.route_center = None
     return
 
-def plot_chart(df_ch, column, time, color):
+#moves the timeframe to a point clicked on the map, from the value returned by st_folium
+#the marker is already drawn by then, so the page is run again for the marker and the slider to follow
+def sync_map_click(st_map):
+    if not st_map.get('last_object_clicked') or st_map['last_object_clicked'] == st.session_state.last_obj_clicked:
+        return
+    st.session_state.last_obj_clicked = st_map['last_object_clicked']
+    properties = (st_map.get('last_active_drawing') or {}).get('properties') or {}
+    if 'seconds' in properties:
+        st.session_state.timeframe = properties['seconds']
+        st.rerun()
 
-    base = alt.Chart(df_ch).properties(width=550)
-    lines = (
-        base.mark_line(color=color)
-        .encode(x=alt.X('time', title='Time'), y=alt.Y(f"{column}", title=column.replace('_',' ').title()))
-    )
-    
-    xrule = (
-        base.mark_rule(color="orange", strokeWidth=2)
-        .encode(x=alt.datum(time), size=alt.value(2))
-    )
+def plot_chart(run, column, seconds, color):
 
-    st.altair_chart(lines + xrule, use_container_width=True) #+ xrule
+    #cached line layer plus the rule for the selected second
+    lines = base_chart(run['area_name'], run['exercise'], column, color, out_dir=st.session_state.get('out_dir', '.'))
+    st.altair_chart(lines + time_rule(seconds), use_container_width=True)
     return 
 
 
-def display_map(df, df_ex, color):
-    min_lat = df_ex['latitude'].min()
-    max_lat = df_ex['latitude'].max()
-    min_long = df_ex['longitude'].min()
-    max_long = df_ex['longitude'].max()
+def display_map(df, run, color, position, swept=False):
+    df_ex = run.columns(['time', 'seconds', 'latitude', 'longitude', 'lod_mask'])
+    min_lat, max_lat, min_long, max_long = run.bounds
+
+    #the map itself only depends on the run, zoom and center are applied on the client so they never remount it
+    map = folium.Map(location=[(min_lat + max_lat) / 2, (min_long + max_long) / 2], zoom_start=MAP_ZOOM, scrollWheelZoom=True, tiles='CartoDB positron')
 
-    map = folium.Map(location=[(min_lat + max_lat) / 2, (min_long + max_long) / 2], zoom_start=st.session_state.zoom_level, scrollWheelZoom=True, tiles='CartoDB positron')
+    #area covered by the hull during the run, precomputed at ingest
+    swept_polygon = read_swept(df['area_name'], df['exercise'], st.session_state.get('out_dir', '.')) if swept else None
+    if swept_polygon is not None:
+        folium.GeoJson(swept_polygon.__geo_interface__, name='swept path', interactive=False,
+                       style_function=lambda feature: {'color': color, 'fillColor': color, 'weight': 0.5, 'fillOpacity': 0.1}).add_to(map)
         
     features = []
     fg_points = folium.FeatureGroup(name="Route Points")
     
-    for index, row in df_ex.iterrows():
-        if row['time'][-1]=='0' or row['time'][-1]=='5':
-            # Create a GeoJSON feature for each row
-            properties = {col:row[col] for col in df_ex.columns}
-            point_geometry = Point(row['longitude'], row['latitude'])
-            point_feature = {
-                'type': 'Feature',
-                'id': row['time'],
-                'geometry': point_geometry.__geo_interface__,
-                'properties': properties,
-            }
-    
-            features.append(point_feature)
+    #clickable points at the level of detail of the current zoom, carrying only the time used by the click handler
+    zoom = st.session_state.zoom_level
+    df_points = select_lod(df_ex, lod_level(zoom, (min_lat + max_lat) / 2))
+    for time, seconds, longitude, latitude in zip(df_points['time'], df_points['seconds'], df_points['longitude'], df_points['latitude']):
+        # Create a GeoJSON feature for each point
+        point_geometry = Point(longitude, latitude)
+        point_feature = {
+            'type': 'Feature',
+            'id': time,
+            'geometry': point_geometry.__geo_interface__,
+            'properties': {'time': time, 'seconds': int(seconds)},
+        }
+
+        features.append(point_feature)
     
         # GeoJSON data for the points
     geojson_data_points = {'type': 'FeatureCollection', 'features': features}
@@ -64,30 +81,64 @@ def display_map(df, df_ex, color):
         ))#.add_to(map)
 
     fg_points.add_child(folium.Marker(
-            location = [df_ex[df_ex['time']==st.session_state.selected_point]['latitude'], df_ex[df_ex['time']==st.session_state.selected_point]['longitude']],
+            location = [float(df_ex['latitude'].values[position]), float(df_ex['longitude'].values[position])],
             name='selected_point',
             icon=folium.Icon(color='orange', icon='ship', prefix='fa')
         ))
 
-    st_map = st_folium(map, width=700, height=450, zoom=st.session_state.zoom_level, use_container_width=True, feature_group_to_add=fg_points)
+    st_map = st_folium(map, width=700, height=450, zoom=zoom, center=st.session_state.route_center, use_container_width=True, feature_group_to_add=fg_points, key='route_map')
+
+    #keep the view the user left the map at, and after a zoom run the page again so the points get the detail of the new zoom
+    #(only the map reports a center, the values returned before it has drawn just echo the defaults)
+    if st_map.get('center'):
+        st.session_state.zoom_level = st_map['zoom']
+        st.session_state.route_center = (st_map['center']['lat'], st_map['center']['lng'])
+        if st_map['zoom'] != zoom:
+            st.rerun()
 
-    selected_point = st.session_state.selected_point
+    sync_map_click(st_map)
+    return
 
-    if st_map['last_object_clicked'] != st.session_state.last_obj_clicked and st_map['last_object_clicked'] != None:
-        selected_point = st_map['last_active_drawing']['properties']['time']
-        st.session_state.last_obj_clicked = st_map['last_object_clicked']
-    return selected_point
+#player document for the given (area, exercise, color, mtime) runs, built once per selection;
+#the timelines go to the browser in one piece and the playback runs there, without reruns
+@st.cache_data(max_entries=8, show_spinner=False)
+def replay_document(runs, out_dir='.'):
+    timelines = []
+    for area_name, exercise, color, _ in runs:
+        frame = run_cache().get(area_name, exercise, out_dir).columns(REPLAY_COLUMNS)
+        timelines.append(run_timeline(exercise, color, frame))
+    return replay_html(timelines)
+
+def display_replay(run, color, profiler=None):
+    df_runs = st.session_state.df_runs
+    #other runs of the same area, played in sync on the time elapsed since their start
+    others = [x for x in df_runs.loc[df_runs['area_name'] == run['area_name'], 'exercise'] if x != run['exercise']]
+    keep_selection('replay_runs', others)
+    compared = st.sidebar.multiselect('Replay with:', options=others, max_selections=len(REPLAY_COLORS) - 1, key='replay_runs')
+    colors = [c for c in REPLAY_COLORS if c != color]
+    out_dir = st.session_state.get('out_dir', '.')
+    runs = tuple((run['area_name'], x, c, run_modified(run['area_name'], x, out_dir)) for x, c in [(run['exercise'], color)] + list(zip(compared, colors)))
+
+    with span(profiler, 'replay', page='Route Analysis', run=run['exercise'], runs=len(runs)):
+        components.html(replay_document(runs, out_dir), height=560)
+    return
 
 def main():
     #using full screen
     st.set_page_config(layout="wide", page_title = 'Route Analysis')
     st.markdown(" <style> div[class^='block-container'] { padding-top: 2rem; } </style> ", unsafe_allow_html=True)
 
+    #runs loaded in the background so far
+    follow_job()
+
     if 'zoom_level' not in st.session_state:
-        st.session_state.zoom_level = 13
+        st.session_state.zoom_level = MAP_ZOOM
+    if 'route_center' not in st.session_state:
+        st.session_state.route_center = None
 
-    if 'selected_point' not in st.session_state:
-        st.session_state.selected_point = '00:00:01'
+    if 'timeframe' not in st.session_state:
+        st.session_state.timeframe = None
+    if 'last_obj_clicked' not in st.session_state:
         st.session_state.last_obj_clicked = None
 
 
@@ -98,41 +149,59 @@ def main():
             run_options = [x if y!=True else f"{x}*" for (x,y) in zip(st.session_state.df_runs['exercise'], st.session_state.df_runs['good_practice'])]
         else:
             run_options = [x for x in st.session_state.df_runs['exercise']]
-        selected_run = st.sidebar.selectbox('Run:', options = run_options, on_change = reset_selected_point)
+        #keyed, so the run picked stays selected while the runs loaded in the background are added (its good practice mark may change)
+        if 'selected_run' in st.session_state:
+            marked = {x.replace('*',''): x for x in run_options}
+            if st.session_state.selected_run.replace('*','') in marked:
+                st.session_state.selected_run = marked[st.session_state.selected_run.replace('*','')]
+            else:
+                del st.session_state['selected_run']
+        selected_run = st.sidebar.selectbox('Run:', options = run_options, on_change = reset_selected_point, key='selected_run')
         #select run dataframe
         if selected_run:
             filtered_data = st.session_state.df_runs[st.session_state.df_runs['exercise']==selected_run.replace('*','')].to_dict('records')[0]
             color = "red" if filtered_data['type'] == 'Arrival' else "blue"
-            df_ex = pd.read_csv(f"{filtered_data['area_name']}/{filtered_data['file_name']}")
-            sel_map = display_map(filtered_data, df_ex, color)
+            #parsed run and its time index, shared with the other pages
+            profiler = st.session_state.get('profiler')
+            with span(profiler, 'load_run', page='Route Analysis', run=filtered_data['exercise']) as s:
+                run = run_cache().get(filtered_data['area_name'], filtered_data['exercise'], st.session_state.get('out_dir', '.'))
+                s['rows'] = run.rows
+            df_ex = run.frame
+            tindex = run.time_index
+
+            #selected second: from a map click, the slider, or the first tick of the run
+            if st.session_state.timeframe is None:
+                st.session_state.timeframe = int(df_ex['seconds'].iat[0])
+            position = position_at(tindex, st.session_state.timeframe)
+            st.session_state.timeframe = int(df_ex['seconds'].iat[position])
+
+            replay = st.sidebar.toggle('Replay mode', key='replay_mode')
+            if replay:
+                display_replay(filtered_data, color, profiler)
+            else:
+                swept = st.sidebar.toggle('Show swept path', value=True)
+                with span(profiler, 'run_map', page='Route Analysis', run=filtered_data['exercise'], rows=run.rows):
+                    display_map(filtered_data, run, color, position, swept)
             #display run info in the sidebar
             with st.sidebar:
                 run_box = st.container(border=True)
                 run_box.write(f"Ship: {filtered_data['ship']}  \nType: {filtered_data['type']}  \nTrainee: {filtered_data['trainee']}  \nWind Direction: {filtered_data['wrose_wind_direction']}  \nWind Speed: {filtered_data['wind_speed']}  \nGusting: {filtered_data['wind_gust']}  \nCurrent Direction: {filtered_data['wrose_current_direction']}  \nCurrent Speed: {filtered_data['current_velocity']}  \nWave Direction: {filtered_data['wind_wave_direction']}  \nWave Height: {filtered_data['wind_wave_height']} ")
 
-            #take info from chart or slider
-            if sel_map:
-                sel_time = st.select_slider("Pick a timeframe:", df_ex['time'].unique(), value = st.session_state.selected_point)
-                if sel_map!=st.session_state.selected_point and sel_time == st.session_state.selected_point:
-                    st.session_state.selected_point = sel_map
-                    sel_time = st.session_state.selected_point
-                    st.experimental_rerun()
-                elif sel_time !=st.session_state.selected_point and sel_time != sel_map:
-                    st.session_state.selected_point = sel_time
-                    #sel_map['time'] = sel_time
-                    st.experimental_rerun()
-                    
-            else:
-                sel_time = st.select_slider("Pick a timeframe:", df_ex['time'].unique(), value = '00:00:01')
-            
-            selection = df_ex[df_ex['time']==sel_time].to_dict('records')[0]
+            #channels to chart and slider, replaced by the player's own readouts and timeline in replay mode
+            channels = []
+            if not replay:
+                channels = st.sidebar.multiselect('Charts:', options=numeric_channels(df_ex), default=DEFAULT_CHANNELS)
+
+                #slider bound to the same state as the map, no extra rerun needed to keep them in sync
+                st.select_slider("Pick a timeframe:", options=df_ex['seconds'].tolist(), key='timeframe', format_func=seconds_to_time)
+
+            selection = row_to_dict(df_ex, position)
 
             
             
-            container_1 = st.container(border=True)
-
             #show point information
-            if selection:
+            if selection and not replay:
+                container_1 = st.container(border=True)
                 col1, col2, col3, col4 = container_1.columns(4)
                 with col1:
                     st.write(f"**WIND**  \nSpeed: {selection['true_wind_speed']}  \nDirection: {selection['true_wind_direction']}")
@@ -146,11 +215,11 @@ def main():
                 with col4:
                     st.write(f"**TRANSVERSE SPEED**  \nAt Ship's Bow: {selection['transverse_speed_at_ships_bow']}  \nAt Ship's Stern: {selection['transverse_speed_at_ships_stern']}  \n")
 
+            if selection:
                 #charts
-                plot_chart(df_ex, 'sog', sel_time, color)
-                plot_chart(df_ex, 'rate_of_turn', sel_time, color)
-                plot_chart(df_ex, 'true_wind_speed', sel_time, color)
-                plot_chart(df_ex, 'true_wind_direction', sel_time, color)
+                for column in channels:
+                    with span(profiler, 'chart', page='Route Analysis', run=filtered_data['exercise'], channel=column):
+                        plot_chart(filtered_data, column, selection['seconds'], color)
 
                 #comments
                 if st.session_state.uploaded_comments:
@@ -211,4 +280,6 @@ def main():
 
 if __name__ == "__main__":
 
-    main()
\ No newline at end of file
+    main()
+    #runs still loading in the background
+    poll_job()
@@ -0,0 +1,98 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+import altair as alt
+from logwise.query import RunIndex
+from logwise.runcache import run_cache
+from logwise.store import run_modified
+from logwise.profiling import span
+from logwise.jobs import follow_job, poll_job, keep_selection
+from logwise.ensemble import resample, envelope, ENSEMBLE_CHANNELS, AXES, PERCENTILES
+
+#resampled (runs x points) arrays of the selected (area, exercise, mtime) runs, kept across reruns for the same selection
+@st.cache_data(max_entries=16, show_spinner='Aligning runs...')
+def aligned_runs(runs, channels, axis, points, out_dir='.'):
+    cache = run_cache()
+    frames = [cache.get(area_name, exercise, out_dir).columns(['seconds', 'distance_to_port'] + list(channels)) for area_name, exercise, _ in runs]
+    return resample(frames, list(channels), axis, points)
+
+#runs to compare, narrowed with the same bitmap index as Filter Routes
+def select_runs(category_filters):
+    if st.session_state.get('ensemble_index_source') is not st.session_state.df_initial:
+        st.session_state.ensemble_index = RunIndex(st.session_state.df_initial, category_filters)
+        st.session_state.ensemble_index_source = st.session_state.df_initial
+    index = st.session_state.ensemble_index
+
+    #keyed, so the values picked survive the runs loaded in the background changing the options
+    selections = {}
+    for filter in category_filters:
+        keep_selection(f'ensemble_{filter}', index.options(filter))
+        selections[filter] = st.sidebar.multiselect(f"{filter.replace('_',' ').title()}:", options=index.options(filter), placeholder='Select all', key=f'ensemble_{filter}')
+    return index.query(selections)
+
+#percentile band, median and mean of one channel, with the single runs faintly behind when asked
+def plot_envelope(grid, stack, channel, axis, runs, show_runs):
+    df_env = envelope(grid, stack)
+    low, mid, high = (f'p{p}' for p in PERCENTILES)
+    x = alt.X('axis', title=AXES[axis], scale=alt.Scale(reverse=axis == 'distance'))
+    title = channel.replace('_',' ').title()
+
+    band = alt.Chart(df_env).mark_area(opacity=0.25, color='steelblue').encode(
+        x=x,
+        y=alt.Y(low, title=title),
+        y2=high,
+        tooltip=[alt.Tooltip('axis', format='.0f'), alt.Tooltip('mean', format='.2f'), alt.Tooltip(low, format='.2f'), alt.Tooltip(mid, format='.2f'), alt.Tooltip(high, format='.2f'), 'runs'],
+    )
+    median = alt.Chart(df_env).mark_line(color='steelblue', strokeDash=[4, 3]).encode(x=x, y=mid)
+    mean = alt.Chart(df_env).mark_line(color='darkblue').encode(x=x, y='mean')
+    layers = [band, median, mean]
+
+    if show_runs:
+        df_runs = pd.DataFrame({
+            'axis': np.tile(grid, len(runs)),
+            'run': np.repeat([exercise for _, exercise, _ in runs], len(grid)),
+            'value': stack.ravel(),
+        }).dropna()
+        layers.insert(0, alt.Chart(df_runs).mark_line(color='gray', opacity=0.3, strokeWidth=1).encode(x=x, y=alt.Y('value', title=title), detail='run'))
+
+    st.altair_chart(alt.layer(*layers), use_container_width=True)
+
+def main():
+    #using full screen
+    st.set_page_config(layout="wide", page_title = 'Ensemble Comparison')
+    st.markdown(" <style> div[class^='block-container'] { padding-top: 2rem; } </style> ", unsafe_allow_html=True)
+
+    #runs loaded in the background so far
+    follow_job()
+
+    if 'df_runs' in st.session_state:
+        selected_df = select_runs(['type', 'ship', 'wrose_wind_direction', 'wrose_current_direction'])
+
+        axis = st.sidebar.radio('Align on:', options=list(AXES), format_func=lambda a: AXES[a])
+        channels = st.sidebar.multiselect('Channels:', options=ENSEMBLE_CHANNELS, default=ENSEMBLE_CHANNELS)
+        points = st.sidebar.select_slider('Resolution (points):', options=[100, 200, 400, 800], value=400)
+        show_runs = st.sidebar.checkbox('Show single runs', value=False)
+
+        if selected_df.shape[0] == 0:
+            st.write('No runs found.')
+            return
+
+        out_dir = st.session_state.get('out_dir', '.')
+        runs = tuple((area_name, exercise, run_modified(area_name, exercise, out_dir)) for area_name, exercise in zip(selected_df['area_name'], selected_df['exercise']))
+        st.write(f"**{len(runs)} runs** - band: P{PERCENTILES[0]} to P{PERCENTILES[-1]}, dashed: median, solid: mean")
+        profiler = st.session_state.get('profiler')
+        with span(profiler, 'ensemble_align', page='Ensemble Comparison', runs=len(runs), channels=len(channels)):
+            grid, stacks = aligned_runs(runs, tuple(channels), axis, points, out_dir)
+
+        for channel in channels:
+            with span(profiler, 'ensemble_chart', page='Ensemble Comparison', runs=len(runs), channel=channel):
+                plot_envelope(grid, stacks[channel], channel, axis, runs, show_runs)
+    else:
+        st.write('Please load the data first.')
+
+
+if __name__ == "__main__":
+
+    main()
+    #runs still loading in the background
+    poll_job()
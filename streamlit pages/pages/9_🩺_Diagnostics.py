@@ -0,0 +1,93 @@
+import streamlit as st
+import pandas as pd
+from logwise.runcache import run_cache
+from logwise.profiling import Profiler
+
+#turns span recording on or off for this session, the other pages pick the profiler up from the session
+#spans recorded so far are kept when only the memory tracing changes
+def toggle_profiling():
+    profiler = st.session_state.pop('profiler', None)
+    if profiler:
+        profiler.close()
+    if st.session_state.record_timings:
+        st.session_state.profiler = Profiler(memory=st.session_state.trace_memory)
+        if profiler:
+            st.session_state.profiler.extend(profiler.spans)
+
+def main():
+    #using full screen
+    st.set_page_config(layout="wide", page_title = 'Diagnostics')
+    st.markdown(" <style> div[class^='block-container'] { padding-top: 2rem; } </style> ", unsafe_allow_html=True)
+
+    #run cache shared by the analysis pages
+    cache = run_cache()
+    stats = cache.stats()
+
+    st.subheader('Run cache')
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric('Cached runs', stats['runs'])
+    col2.metric('Memory', f"{stats['memory_mb']:.1f} / {stats['budget_mb']:.0f} MB")
+    col3.metric('Hits / misses', f"{stats['hits']} / {stats['misses']}", f"{stats['hit_rate']:.0%} hit rate", delta_color='off')
+    col4.metric('Evictions', stats['evictions'])
+
+    contents = cache.contents()
+    if contents:
+        st.dataframe(pd.DataFrame(contents), column_config={
+            "area_name": "Area",
+            "exercise": "Run",
+            "rows": "Rows",
+            "memory_mb": st.column_config.NumberColumn("Memory (MB)", format="%.2f"),
+            "decoded_mb": st.column_config.NumberColumn("Decoded frame (MB)", format="%.2f"),
+            "tracks": "Simplified tracks"
+        },
+        use_container_width=True,
+        hide_index=True)
+
+    if st.button('Clear run cache'):
+        cache.clear()
+        st.rerun()
+
+    #timing spans of the ingestion stages and page builds
+    st.subheader('Timings')
+    col1, col2 = st.columns(2)
+    col1.toggle('Record timings', value='profiler' in st.session_state, key='record_timings', on_change=toggle_profiling)
+    col2.toggle('Trace peak memory (much slower)', value=st.session_state.get('profiler') is not None and st.session_state.profiler.memory, key='trace_memory', on_change=toggle_profiling)
+
+    profiler = st.session_state.get('profiler')
+    if profiler is None:
+        st.write('Turn on recording, then load data or browse the other pages to collect timings.')
+    elif not profiler.spans:
+        st.write('No timings recorded yet.')
+    else:
+        df_spans = pd.DataFrame(profiler.spans)
+        aggregations = {'count': ('seconds', 'size'), 'total_s': ('seconds', 'sum'), 'mean_s': ('seconds', 'mean'), 'max_s': ('seconds', 'max')}
+        if 'rows' in df_spans:
+            aggregations['rows'] = ('rows', lambda rows: rows.sum(min_count=1))
+        if 'peak_mb' in df_spans:
+            aggregations['peak_mb'] = ('peak_mb', 'max')
+        df_stages = df_spans.groupby('name', sort=False).agg(**aggregations).reset_index()
+        st.dataframe(df_stages, column_config={
+            "name": "Stage",
+            "count": "Spans",
+            "total_s": st.column_config.NumberColumn("Total (s)", format="%.3f"),
+            "mean_s": st.column_config.NumberColumn("Mean (s)", format="%.3f"),
+            "max_s": st.column_config.NumberColumn("Max (s)", format="%.3f"),
+            "rows": "Rows",
+            "peak_mb": st.column_config.NumberColumn("Peak memory (MB)", format="%.1f")
+        },
+        use_container_width=True,
+        hide_index=True)
+
+        with st.expander('All spans'):
+            st.dataframe(df_spans.drop(columns='started'), use_container_width=True, hide_index=True)
+
+        col1, col2 = st.columns(2)
+        col1.download_button('Export as JSON lines', profiler.to_jsonl(), file_name='logwise_timings.jsonl', mime='application/jsonl')
+        if col2.button('Clear timings'):
+            profiler.clear()
+            st.rerun()
+
+
+if __name__ == "__main__":
+
+    main()